@@ -0,0 +1,208 @@
+"""Offline benchmarks for the trend scoring and video render hot paths.
+
+Everything runs on synthetic inputs (no APIs, no MongoDB). Results are printed as
+JSON; pass --save-baseline to store them and compare later runs against it.
+
+    python benchmark.py                      # run and compare with benchmark_baseline.json
+    python benchmark.py --save-baseline      # run and store a new baseline
+    python benchmark.py --engines numpy      # only render with the numpy engine
+"""
+from __future__ import annotations
+
+import argparse
+import atexit
+import json
+import os
+import platform
+import resource
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from typing import Callable
+
+import numpy as np
+import soundfile as sf
+
+WORKDIR = Path(tempfile.mkdtemp(prefix="ai-tech-finance-bench-"))
+atexit.register(shutil.rmtree, WORKDIR, ignore_errors=True)
+# Keep every cache the render path touches out of output/ so runs start cold and isolated.
+os.environ["BACKGROUND_CACHE_DIR"] = str(WORKDIR / "backgrounds")
+
+from src.trends.scorer import velocity_score  # noqa: E402
+from src.video.captions import build_captions  # noqa: E402
+from src.video.producer import (  # noqa: E402
+    ENGINES,
+    _find_font,
+    _gradient_background,
+    _render_text,
+    _word_timings,
+    produce_video,
+)
+
+ASSETS = Path("assets")
+DEFAULT_BASELINE = Path("benchmark_baseline.json")
+NARRATION = (
+    "Stop scrolling, because your bank is quietly charging you for things you forgot about. "
+    "AI budgeting apps now read every transaction, flag duplicate subscriptions, and predict "
+    "next month's bills before they land. One tester found forty dollars a month in streaming "
+    "services they never opened. Another cut grocery spending by comparing prices across "
+    "three stores automatically. The catch is privacy, so check what data the app keeps and "
+    "whether you can export and delete it. Start with read-only access, review the flagged "
+    "charges weekly, and cancel anything you would not sign up for again today. Follow for "
+    "more ways to make AI pay for itself."
+)
+SCRIPT = {
+    "topic": "AI budgeting apps",
+    "hook": "Your bank is charging you for things you forgot",
+    "body_points": [
+        "AI apps flag duplicate subscriptions",
+        "They predict next month's bills",
+        "Check what data they keep",
+    ],
+    "cta": "Follow for more",
+    "hashtags": ["ai", "personalfinance"],
+    "narration": NARRATION,
+}
+
+
+def _sine_wav(path: Path, seconds: float, sample_rate: int = 24000) -> Path:
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    sf.write(str(path), (0.2 * np.sin(2 * np.pi * 220 * t)).astype(np.float32), sample_rate)
+    return path
+
+
+def _peak_memory(func: Callable[[], object]) -> int:
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def measure(func: Callable[[], object], number: int, repeat: int) -> dict:
+    """Time ``number`` calls ``repeat`` times; report per-call seconds and traced peak bytes."""
+    func()  # warm-up: imports, lazy caches, page faults
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        samples.append((time.perf_counter() - start) / number)
+    return {
+        "min_s": min(samples),
+        "median_s": statistics.median(samples),
+        "number": number,
+        "repeat": repeat,
+        "peak_bytes": _peak_memory(func),
+    }
+
+
+def measure_once(func: Callable[[], object]) -> dict:
+    """Single timed run for expensive cases; memory comes from the same run."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        func()
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {"min_s": elapsed, "median_s": elapsed, "number": 1, "repeat": 1, "peak_bytes": peak}
+
+
+def micro_benchmarks() -> dict[str, dict]:
+    rng = np.random.default_rng(0)
+    series = (np.cumsum(rng.normal(0.5, 3, 168)) + 50).tolist()
+    font_path = _find_font(ASSETS / "fonts")
+    words = [word.upper() for word in NARRATION.split()]
+    def render_words() -> None:
+        for word in words:
+            _render_text(word, font_path, 96)
+
+    _gradient_background()  # pre-render the background once; the case measures reuse
+    return {
+        "velocity_score": measure(lambda: velocity_score(series), number=2000, repeat=5),
+        "build_captions": measure(lambda: build_captions(NARRATION, 45.0), number=2000, repeat=5),
+        "word_timings": measure(lambda: _word_timings(NARRATION, 45.0), number=2000, repeat=5),
+        "render_text": measure(render_words, number=1, repeat=5),
+        "gradient_background": measure(_gradient_background, number=5, repeat=5),
+    }
+
+
+def render_benchmarks(engines: list[str], seconds: float) -> dict[str, dict]:
+    audio_path = _sine_wav(WORKDIR / "sine.wav", seconds)
+    results = {}
+    for engine in engines:
+        output_path = WORKDIR / f"render-{engine}.mp4"
+        before = resource.getrusage(resource.RUSAGE_CHILDREN)
+        result = measure_once(lambda: produce_video(SCRIPT, audio_path, output_path, ASSETS, engine=engine))
+        after = resource.getrusage(resource.RUSAGE_CHILDREN)
+        result["child_cpu_s"] = (after.ru_utime + after.ru_stime) - (before.ru_utime + before.ru_stime)
+        result["child_max_rss_kb"] = after.ru_maxrss
+        result["output_bytes"] = output_path.stat().st_size
+        results[f"produce_video[{engine}]"] = result
+    return results
+
+
+def compare(results: dict[str, dict], baseline: dict[str, dict], tolerance: float) -> list[str]:
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        ratio = current["min_s"] / previous["min_s"] if previous["min_s"] else 1.0
+        current["vs_baseline"] = round(ratio, 3)
+        if ratio > 1 + tolerance:
+            regressions.append(f"{name}: {ratio:.2f}x slower ({previous['min_s']:.6f}s -> {current['min_s']:.6f}s)")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--engines", default=",".join(ENGINES), help="comma-separated video engines to render")
+    parser.add_argument("--seconds", type=float, default=10.0, help="length of the rendered test video")
+    parser.add_argument("--skip-render", action="store_true", help="only run the micro benchmarks")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown before failing")
+    parser.add_argument("--output", type=Path, help="also write the JSON report here")
+    args = parser.parse_args()
+
+    results = micro_benchmarks()
+    if not args.skip_render:
+        results.update(render_benchmarks([e for e in args.engines.split(",") if e], args.seconds))
+
+    report = {
+        "generated_at": datetime.utcnow().isoformat(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        # tracemalloc only sees Python/NumPy allocations; RSS also covers PIL and codec buffers.
+        "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        "results": results,
+    }
+    regressions: list[str] = []
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+    elif args.baseline.exists():
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+        regressions = compare(results, baseline["results"], args.tolerance)
+        report["regressions"] = regressions
+
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        args.output.write_text(text + "\n", encoding="utf-8")
+    for line in regressions:
+        print(f"REGRESSION {line}", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,252 @@
+"""Command-line entry point: run one pipeline stage, the whole pipeline, or the scheduler.
+
+Each command imports only what its stage needs, so short-lived invocations
+(cron, one-off containers) skip loading the video and TTS stacks.
+
+    python -m src.cli detect --limit 5
+    python -m src.cli script "AI budgeting apps" -o script.json
+    python -m src.cli voice script.json output/voice.wav
+    python -m src.cli render script.json output/voice.wav output/video.mp4
+    python -m src.cli post output/video.mp4 --title "..."
+    python -m src.cli run
+    python -m src.cli schedule
+    python -m src.cli worker --stages render   # take render jobs from the shared queue
+    python -m src.cli imports          # import time and memory per command
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+# What each command imports; the import report loads exactly these.
+COMMAND_MODULES: dict[str, list[str]] = {
+    "detect": [
+        "src.orchestrator",
+        "src.trends.clustering",
+        "src.trends.collector",
+        "src.trends.google_trends",
+        "src.trends.reddit_trends",
+        "src.trends.tiktok_trends",
+        "src.trends.store",
+    ],
+    "script": ["src.scripts.generator"],
+    "voice": ["src.video.voiceover"],
+    "render": ["src.video.producer"],
+    "post": ["src.poster.uploader"],
+}
+COMMAND_MODULES["run"] = [
+    module for command in ("detect", "script", "voice", "render", "post") for module in COMMAND_MODULES[command]
+]
+COMMAND_MODULES["worker"] = [
+    "src.orchestrator",
+    *(module for command in ("script", "voice", "render", "post") for module in COMMAND_MODULES[command]),
+]
+COMMAND_MODULES["schedule"] = [
+    *COMMAND_MODULES["run"],
+    "apscheduler.schedulers.background",
+    "src.poster.status_tracker",
+]
+
+_REPORT_CHILD = (
+    "import importlib, json, resource, sys\n"
+    "for module in sys.argv[1:]:\n"
+    "    importlib.import_module(module)\n"
+    "print(json.dumps({'max_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss}))\n"
+)
+
+
+def _read_json(path: Path) -> dict:
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def _write_json(data, output: Path | None) -> None:
+    text = json.dumps(data, indent=2, default=str)
+    if output is None:
+        print(text)
+    else:
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(text + "\n", encoding="utf-8")
+
+
+def cmd_detect(args: argparse.Namespace) -> None:
+    from src.orchestrator import detect_trends
+
+    trends = detect_trends()[: args.limit]
+    _write_json([{key: trend[key] for key in ("topic", "source", "score")} for trend in trends], args.output)
+
+
+def cmd_script(args: argparse.Namespace) -> None:
+    from src.scripts.generator import generate_script
+
+    _write_json(generate_script(args.topic, use_cache=not args.no_cache), args.output)
+
+
+def cmd_voice(args: argparse.Namespace) -> None:
+    from src.video.voiceover import VoiceoverGenerator
+
+    text = args.text if args.text is not None else _read_json(args.script)["narration"]
+    result = VoiceoverGenerator(voice=args.voice).synthesize(text, args.output)
+    print(f"{result.audio_path} ({result.duration:.2f}s)")
+
+
+def cmd_render(args: argparse.Namespace) -> None:
+    from src.video.producer import produce_video
+
+    result = produce_video(
+        _read_json(args.script),
+        args.audio,
+        args.output,
+        args.assets,
+        engine=args.engine,
+        background=args.background,
+    )
+    print(f"{result.video_path} ({result.duration:.2f}s)")
+
+
+def cmd_post(args: argparse.Namespace) -> None:
+    from src.poster.uploader import post_video
+
+    result = post_video(args.video, title=args.title)
+    print(f"{result.publish_id} {result.status}")
+
+
+def cmd_run(args: argparse.Namespace) -> None:
+    from src.orchestrator import get_pipeline, run_pipeline
+    from src.video.voiceover import enable_tts_pool
+
+    enable_tts_pool()
+    run_pipeline(wait=True)
+    get_pipeline().shutdown()
+
+
+def cmd_schedule(args: argparse.Namespace) -> None:
+    from src.orchestrator import main
+
+    main()
+
+
+def cmd_worker(args: argparse.Namespace) -> None:
+    from src.orchestrator import run_worker
+
+    run_worker(set(args.stages) if args.stages else None)
+
+
+def _top_imports(importtime: str, limit: int) -> list[tuple[str, float]]:
+    """Cumulative import seconds per top-level package from ``-X importtime`` output."""
+    totals: dict[str, float] = {}
+    for line in importtime.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        # Nested imports are indented further and already counted in their parent.
+        if name[1:].startswith(" "):
+            continue
+        root = name.strip().split(".")[0]
+        totals[root] = totals.get(root, 0.0) + int(cumulative) / 1e6
+    return sorted(totals.items(), key=lambda item: item[1], reverse=True)[:limit]
+
+
+def cmd_imports(args: argparse.Namespace) -> None:
+    commands = args.commands or list(COMMAND_MODULES)
+    report = {}
+    for command in commands:
+        modules = COMMAND_MODULES[command]
+        start = time.perf_counter()
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", _REPORT_CHILD, *modules],
+            capture_output=True,
+            text=True,
+        )
+        elapsed = time.perf_counter() - start
+        if proc.returncode != 0:
+            report[command] = {"error": proc.stderr.strip().splitlines()[-1]}
+            continue
+        report[command] = {
+            "seconds": round(elapsed, 3),
+            "max_rss_mb": round(json.loads(proc.stdout)["max_rss_kb"] / 1024, 1),
+            "slowest": dict(_top_imports(proc.stderr, args.top)),
+        }
+    if args.json:
+        _write_json(report, None)
+        return
+    for command, row in report.items():
+        if "error" in row:
+            print(f"{command:<9} failed: {row['error']}")
+            continue
+        slowest = ", ".join(f"{name} {seconds:.2f}s" for name, seconds in row["slowest"].items())
+        print(f"{command:<9} {row['seconds']:6.2f}s {row['max_rss_mb']:7.1f} MB  {slowest}")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m src.cli", description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    detect = commands.add_parser("detect", help="collect, store and cluster trend signals")
+    detect.add_argument("--limit", type=int, default=10)
+    detect.add_argument("-o", "--output", type=Path)
+    detect.set_defaults(func=cmd_detect)
+
+    script = commands.add_parser("script", help="generate a script for a topic")
+    script.add_argument("topic")
+    script.add_argument("--no-cache", action="store_true")
+    script.add_argument("-o", "--output", type=Path)
+    script.set_defaults(func=cmd_script)
+
+    voice = commands.add_parser("voice", help="synthesize a script's narration")
+    voice.add_argument("script", type=Path, nargs="?", help="script JSON from the script command")
+    voice.add_argument("output", type=Path)
+    voice.add_argument("--text", help="narrate this text instead of a script file")
+    voice.add_argument("--voice", default="af_bella")
+    voice.set_defaults(func=cmd_voice)
+
+    render = commands.add_parser("render", help="render a video from a script and narration")
+    render.add_argument("script", type=Path)
+    render.add_argument("audio", type=Path)
+    render.add_argument("output", type=Path)
+    render.add_argument("--assets", type=Path, default=Path("assets"))
+    render.add_argument("--engine")
+    render.add_argument("--background")
+    render.set_defaults(func=cmd_render)
+
+    post = commands.add_parser("post", help="upload a video to TikTok")
+    post.add_argument("video", type=Path)
+    post.add_argument("--title", required=True)
+    post.set_defaults(func=cmd_post)
+
+    run = commands.add_parser("run", help="run the pipeline once and wait for it to finish")
+    run.set_defaults(func=cmd_run)
+
+    schedule = commands.add_parser("schedule", help="start the scheduler (long-running)")
+    schedule.set_defaults(func=cmd_schedule)
+
+    worker = commands.add_parser("worker", help="work on queued pipeline stages (long-running)")
+    worker.add_argument("--stages", nargs="+", help="stages to take jobs for (default: WORKER_STAGES, else all)")
+    worker.set_defaults(func=cmd_worker)
+
+    imports = commands.add_parser("imports", help="report import time and memory per command")
+    imports.add_argument("commands", nargs="*", metavar="command", help=", ".join(COMMAND_MODULES))
+    imports.add_argument("--top", type=int, default=5, help="slowest packages to list per command")
+    imports.add_argument("--json", action="store_true")
+    imports.set_defaults(func=cmd_imports)
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.command == "voice" and args.script is None and args.text is None:
+        parser.error("voice needs a script file or --text")
+    if args.command == "imports":
+        unknown = sorted(set(args.commands) - set(COMMAND_MODULES))
+        if unknown:
+            parser.error(f"unknown commands: {', '.join(unknown)}")
+    args.func(args)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,10 +1,15 @@
+from __future__ import annotations
+
 import logging
 import os
 from dataclasses import dataclass
 from functools import lru_cache
+from typing import TYPE_CHECKING
 
 from dotenv import load_dotenv
-from pymongo import MongoClient
+
+if TYPE_CHECKING:
+    from pymongo import MongoClient
 
 load_dotenv(override=True)
 
@@ -24,7 +29,49 @@ class Config:
     )
     log_level: str = os.getenv("LOG_LEVEL", "INFO")
     posts_per_day: int = int(os.getenv("POSTS_PER_DAY", "2"))
+    pipeline_topics_per_run: int = int(os.getenv("PIPELINE_TOPICS_PER_RUN", "1"))
+    pipeline_queue_size: int = int(os.getenv("PIPELINE_QUEUE_SIZE", "2"))
+    pipeline_script_workers: int = int(os.getenv("PIPELINE_SCRIPT_WORKERS", "2"))
+    pipeline_voice_workers: int = int(os.getenv("PIPELINE_VOICE_WORKERS", "1"))
+    pipeline_render_workers: int = int(os.getenv("PIPELINE_RENDER_WORKERS", "1"))
+    pipeline_upload_workers: int = int(os.getenv("PIPELINE_UPLOAD_WORKERS", "2"))
+    pipeline_max_attempts: int = int(os.getenv("PIPELINE_MAX_ATTEMPTS", "3"))
+    # "local" keeps jobs in this process; "mongo" shares them between replicas.
+    pipeline_backend: str = os.getenv("PIPELINE_BACKEND", "local")
+    # Comma-separated stages this node works on with the mongo backend; empty means all.
+    worker_stages: str = os.getenv("WORKER_STAGES", "")
+    job_lease_seconds: int = int(os.getenv("JOB_LEASE_SECONDS", "300"))
+    job_poll_seconds: float = float(os.getenv("JOB_POLL_SECONDS", "5"))
     post_privacy: str = os.getenv("POST_PRIVACY", "SELF_ONLY")
+    trend_fetch_timeout: float = float(os.getenv("TREND_FETCH_TIMEOUT", "60"))
+    trend_fetch_workers: int = int(os.getenv("TREND_FETCH_WORKERS", "4"))
+    google_trends_rps: float = float(os.getenv("GOOGLE_TRENDS_RPS", "0.5"))
+    google_trends_burst: int = int(os.getenv("GOOGLE_TRENDS_BURST", "4"))
+    trend_retention_days: int = int(os.getenv("TREND_RETENTION_DAYS", "30"))
+    trend_rollup_retention_days: int = int(os.getenv("TREND_ROLLUP_RETENTION_DAYS", "365"))
+    llm_cache_enabled: bool = os.getenv("LLM_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+    llm_cache_dir: str = os.getenv("LLM_CACHE_DIR", "output/cache/llm")
+    llm_cache_max_mb: int = int(os.getenv("LLM_CACHE_MAX_MB", "50"))
+    llm_cache_max_age_hours: float = float(os.getenv("LLM_CACHE_MAX_AGE_HOURS", "72"))
+    llm_streaming: bool = os.getenv("LLM_STREAMING", "true").lower() in ("1", "true", "yes")
+    # Unset: synthesize in-process, except under entry points that call enable_tts_pool().
+    tts_workers: int | None = int(os.environ["TTS_WORKERS"]) if os.getenv("TTS_WORKERS") else None
+    tts_cache_enabled: bool = os.getenv("TTS_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+    tts_cache_dir: str = os.getenv("TTS_CACHE_DIR", "output/cache/tts")
+    tts_cache_max_mb: int = int(os.getenv("TTS_CACHE_MAX_MB", "500"))
+    video_engine: str = os.getenv("VIDEO_ENGINE", "moviepy")
+    render_workers: int = int(os.getenv("RENDER_WORKERS", str(os.cpu_count() or 1)))
+    video_background: str = os.getenv("VIDEO_BACKGROUND", "gradient")
+    background_cache_dir: str = os.getenv("BACKGROUND_CACHE_DIR", "output/cache/backgrounds")
+    background_loop_frames: int = int(os.getenv("BACKGROUND_LOOP_FRAMES", "60"))
+    http_max_connections: int = int(os.getenv("HTTP_MAX_CONNECTIONS", "32"))
+    http_max_per_host: int = int(os.getenv("HTTP_MAX_PER_HOST", "8"))
+    http_max_attempts: int = int(os.getenv("HTTP_MAX_ATTEMPTS", "4"))
+    upload_chunk_mb: int = int(os.getenv("UPLOAD_CHUNK_MB", "10"))
+    upload_chunk_attempts: int = int(os.getenv("UPLOAD_CHUNK_ATTEMPTS", "5"))
+    publish_status_interval: int = int(os.getenv("PUBLISH_STATUS_INTERVAL", "30"))
+    metrics_host: str = os.getenv("METRICS_HOST", "127.0.0.1")
+    metrics_port: int = int(os.getenv("METRICS_PORT", "9108"))
 
 
 DB_NAME = "ai_tech_finance"
@@ -32,6 +79,12 @@ COLLECTION_TRENDS = "trends"
 COLLECTION_SCRIPTS = "scripts"
 COLLECTION_VIDEOS = "videos"
 COLLECTION_POSTS = "posts"
+COLLECTION_REDDIT_POSTS = "reddit_posts"
+COLLECTION_TREND_ROLLUPS = "trend_rollups"
+COLLECTION_RUNS = "runs"
+COLLECTION_RUN_STATES = "run_states"
+COLLECTION_UPLOAD_SESSIONS = "upload_sessions"
+COLLECTION_JOBS = "jobs"
 
 
 @lru_cache(maxsize=1)
@@ -41,6 +94,9 @@ def get_config() -> Config:
 
 @lru_cache(maxsize=1)
 def get_mongo_client() -> MongoClient:
+    # Imported on first use: commands that never touch MongoDB skip loading pymongo.
+    from pymongo import MongoClient
+
     return MongoClient(get_config().mongo_uri)
 
 
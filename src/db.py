@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import hashlib
+from functools import lru_cache
+
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import OperationFailure
+
+from src.config import (
+    COLLECTION_JOBS,
+    COLLECTION_POSTS,
+    COLLECTION_REDDIT_POSTS,
+    COLLECTION_RUN_STATES,
+    COLLECTION_RUNS,
+    COLLECTION_SCRIPTS,
+    COLLECTION_TREND_ROLLUPS,
+    COLLECTION_TRENDS,
+    COLLECTION_UPLOAD_SESSIONS,
+    COLLECTION_VIDEOS,
+    DB_NAME,
+    get_logger,
+    get_mongo_client,
+)
+
+# Indexes correctness depends on; a process that cannot build them does not start.
+REQUIRED_INDEXES: dict[str, list[IndexModel]] = {
+    # posts also holds the OAuth token document, which has no topic_hash. One post per
+    # topic: the upload stage claims the topic's document before it uploads anything.
+    COLLECTION_POSTS: [
+        IndexModel(
+            [("topic_hash", ASCENDING)],
+            name="topic_hash_unique",
+            unique=True,
+            partialFilterExpression={"topic_hash": {"$exists": True}},
+        ),
+    ],
+}
+
+INDEXES: dict[str, list[IndexModel]] = {
+    # Daily trend buckets; legacy per-signal documents have no window.
+    COLLECTION_TRENDS: [
+        IndexModel(
+            [("topic_hash", ASCENDING), ("source", ASCENDING), ("window", ASCENDING)],
+            unique=True,
+            partialFilterExpression={"window": {"$exists": True}},
+        ),
+        IndexModel([("expires_at", ASCENDING)], expireAfterSeconds=0),
+    ],
+    COLLECTION_TREND_ROLLUPS: [
+        IndexModel(
+            [("topic_hash", ASCENDING), ("source", ASCENDING), ("period", ASCENDING)],
+            unique=True,
+        ),
+        IndexModel([("expires_at", ASCENDING)], expireAfterSeconds=0),
+    ],
+    COLLECTION_SCRIPTS: [
+        IndexModel([("topic", ASCENDING)]),
+        IndexModel([("created_at", DESCENDING)]),
+    ],
+    COLLECTION_VIDEOS: [
+        IndexModel([("topic", ASCENDING)]),
+        IndexModel([("created_at", DESCENDING)]),
+    ],
+    COLLECTION_POSTS: [
+        IndexModel([("type", ASCENDING)], sparse=True),
+        IndexModel([("next_check_at", ASCENDING)], sparse=True),
+        IndexModel([("created_at", DESCENDING)]),
+    ],
+    COLLECTION_REDDIT_POSTS: [
+        IndexModel([("created_at", ASCENDING)]),
+    ],
+    COLLECTION_RUNS: [
+        IndexModel([("kind", ASCENDING), ("started_at", DESCENDING)]),
+        IndexModel([("run_id", ASCENDING)], unique=True),
+    ],
+    # _id is the topic hash, so there is one checkpoint document per topic.
+    COLLECTION_RUN_STATES: [
+        IndexModel([("status", ASCENDING), ("updated_at", ASCENDING)]),
+    ],
+    # _id is the topic hash; tick:* documents are the scheduler's cross-replica locks.
+    COLLECTION_JOBS: [
+        IndexModel([("stage", ASCENDING), ("status", ASCENDING), ("available_at", ASCENDING)]),
+    ],
+    # _id is the video's sha256; sessions disappear once their upload_url has expired.
+    COLLECTION_UPLOAD_SESSIONS: [
+        IndexModel([("expires_at", ASCENDING)], expireAfterSeconds=0),
+    ],
+}
+
+
+def topic_hash(topic: str) -> str:
+    return hashlib.sha256(topic.lower().encode("utf-8")).hexdigest()
+
+
+def _migrate_posts_topic_hash(db) -> None:
+    """Swap the old non-unique posts.topic_hash index for topic_hash_unique.
+
+    Older runs could leave several posts for one topic. The first published one
+    (else the oldest) keeps its topic_hash; the others keep their history under
+    ``duplicate_topic_hash``, which the unique index ignores.
+    """
+    posts = db[COLLECTION_POSTS]
+    if "topic_hash_1" not in posts.index_information():
+        return
+    logger = get_logger()
+    duplicates = posts.aggregate(
+        [
+            {"$match": {"topic_hash": {"$exists": True}}},
+            {"$sort": {"created_at": ASCENDING}},
+            {
+                "$group": {
+                    "_id": "$topic_hash",
+                    "posts": {"$push": {"_id": "$_id", "published": {"$ifNull": ["$publish_id", False]}}},
+                }
+            },
+            {"$match": {"posts.1": {"$exists": True}}},
+        ]
+    )
+    for group in duplicates:
+        keep = next((post for post in group["posts"] if post["published"]), group["posts"][0])
+        others = [post["_id"] for post in group["posts"] if post["_id"] != keep["_id"]]
+        posts.update_many({"_id": {"$in": others}}, {"$rename": {"topic_hash": "duplicate_topic_hash"}})
+        logger.warning("Kept post %s for topic %s; marked %d duplicates", keep["_id"], group["_id"], len(others))
+    posts.drop_index("topic_hash_1")
+    logger.info("Replaced posts index topic_hash_1 with topic_hash_unique")
+
+
+@lru_cache(maxsize=1)
+def ensure_indexes() -> None:
+    """Create the indexes every collection relies on. Runs once per process.
+
+    A failure on ``REQUIRED_INDEXES`` raises. Any other collection whose indexes
+    cannot be built is logged and skipped, since those only cost speed.
+    """
+    logger = get_logger()
+    db = get_mongo_client()[DB_NAME]
+    _migrate_posts_topic_hash(db)
+    for collection, indexes in REQUIRED_INDEXES.items():
+        db[collection].create_indexes(indexes)
+    for collection, indexes in INDEXES.items():
+        try:
+            names = db[collection].create_indexes(indexes)
+        except OperationFailure as exc:
+            logger.error("Could not create indexes on %s: %s", collection, exc)
+            continue
+        logger.debug("Indexes ready on %s: %s", collection, ", ".join(names))
+    logger.info("MongoDB indexes ensured on %d collections", len(INDEXES))
@@ -0,0 +1,242 @@
+from __future__ import annotations
+
+import asyncio
+import importlib.util
+import random
+import threading
+import time
+import weakref
+from contextlib import ExitStack, contextmanager
+from functools import lru_cache
+from typing import Any, Iterator
+from urllib.parse import urlsplit
+
+import httpx
+from tenacity import (
+    AsyncRetrying,
+    RetryCallState,
+    Retrying,
+    retry_if_exception_type,
+    retry_if_result,
+    stop_after_attempt,
+    wait_exponential_jitter,
+)
+
+from src.config import get_config, get_logger
+from src.metrics import record_http, record_retry
+
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+# Safe to send twice. Anything else may already have taken effect when a timeout or 5xx
+# comes back, so it is only retried on 429, which the server rejects before acting.
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+MAX_RETRY_AFTER = 60.0
+
+_backoff = wait_exponential_jitter(initial=0.5, max=30)
+_host_semaphores: dict[str, threading.BoundedSemaphore] = {}
+_host_semaphores_lock = threading.Lock()
+_async_clients: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient] = (
+    weakref.WeakKeyDictionary()
+)
+_async_semaphores: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict[str, asyncio.Semaphore]] = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _client_options() -> dict[str, Any]:
+    config = get_config()
+    return {
+        # HTTP/2 needs the optional h2 package (httpx[http2]); fall back to HTTP/1.1 keep-alive.
+        "http2": importlib.util.find_spec("h2") is not None,
+        "limits": httpx.Limits(
+            max_connections=config.http_max_connections,
+            max_keepalive_connections=config.http_max_connections,
+            keepalive_expiry=60,
+        ),
+        "timeout": httpx.Timeout(30),
+    }
+
+
+@lru_cache(maxsize=1)
+def get_http_client() -> httpx.Client:
+    return httpx.Client(**_client_options())
+
+
+def get_async_http_client() -> httpx.AsyncClient:
+    """Pooled async client for the running event loop (async clients cannot be shared across loops)."""
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = httpx.AsyncClient(**_client_options())
+        _async_clients[loop] = client
+    return client
+
+
+def _host_semaphore(url: str) -> threading.BoundedSemaphore:
+    host = urlsplit(url).netloc
+    with _host_semaphores_lock:
+        if host not in _host_semaphores:
+            _host_semaphores[host] = threading.BoundedSemaphore(get_config().http_max_per_host)
+        return _host_semaphores[host]
+
+
+def _async_host_semaphore(url: str) -> asyncio.Semaphore:
+    semaphores = _async_semaphores.setdefault(asyncio.get_running_loop(), {})
+    host = urlsplit(url).netloc
+    if host not in semaphores:
+        semaphores[host] = asyncio.Semaphore(get_config().http_max_per_host)
+    return semaphores[host]
+
+
+def _is_idempotent(method: str, idempotent: bool | None) -> bool:
+    return method.upper() in IDEMPOTENT_METHODS if idempotent is None else idempotent
+
+
+def _should_retry(response: httpx.Response) -> bool:
+    return response.status_code in RETRY_STATUSES
+
+
+def _rejected(response: httpx.Response) -> bool:
+    return response.status_code == 429
+
+
+def _wait(retry_state: RetryCallState) -> float:
+    outcome = retry_state.outcome
+    if outcome is not None and not outcome.failed:
+        retry_after = outcome.result().headers.get("Retry-After", "")
+        if retry_after.isdigit():
+            return min(float(retry_after), MAX_RETRY_AFTER)
+    return _backoff(retry_state)
+
+
+def _record(response: httpx.Response) -> None:
+    # Body bytes only; streamed uploads without Content-Length count as zero out.
+    record_http(response.num_bytes_downloaded, int(response.request.headers.get("content-length", 0)))
+
+
+def _log_retry(retry_state: RetryCallState) -> None:
+    record_retry()
+    outcome = retry_state.outcome
+    reason = outcome.exception() if outcome.failed else f"HTTP {outcome.result().status_code}"
+    get_logger().warning(
+        "HTTP %s %s failed (%s); retry %d",
+        retry_state.args[0] if retry_state.args else "",
+        retry_state.args[1] if len(retry_state.args) > 1 else "",
+        reason,
+        retry_state.attempt_number,
+    )
+
+
+def _retry_options(max_attempts: int | None, idempotent: bool) -> dict[str, Any]:
+    if idempotent:
+        retry = retry_if_exception_type(httpx.TransportError) | retry_if_result(_should_retry)
+    else:
+        retry = retry_if_result(_rejected)
+    return {
+        "retry": retry,
+        "wait": _wait,
+        "stop": stop_after_attempt(max_attempts or get_config().http_max_attempts),
+        "before_sleep": _log_retry,
+        # Once attempts run out, hand back the last response (or raise the last error)
+        # so callers keep using raise_for_status as before.
+        "retry_error_callback": lambda retry_state: retry_state.outcome.result(),
+    }
+
+
+def _send(method: str, url: str, **kwargs: Any) -> httpx.Response:
+    with _host_semaphore(url):
+        response = get_http_client().request(method, url, **kwargs)
+    _record(response)
+    return response
+
+
+async def _asend(method: str, url: str, **kwargs: Any) -> httpx.Response:
+    async with _async_host_semaphore(url):
+        response = await get_async_http_client().request(method, url, **kwargs)
+    _record(response)
+    return response
+
+
+def request(
+    method: str,
+    url: str,
+    *,
+    max_attempts: int | None = None,
+    idempotent: bool | None = None,
+    **kwargs: Any,
+) -> httpx.Response:
+    """Send a request on the shared pool, retrying with backoff.
+
+    Idempotent requests retry 429/5xx and transport errors; others only 429.
+    ``idempotent`` overrides the method's default, e.g. for read-only POSTs.
+    """
+    options = _retry_options(max_attempts, _is_idempotent(method, idempotent))
+    return Retrying(**options)(_send, method, url, **kwargs)
+
+
+async def arequest(
+    method: str,
+    url: str,
+    *,
+    max_attempts: int | None = None,
+    idempotent: bool | None = None,
+    **kwargs: Any,
+) -> httpx.Response:
+    options = _retry_options(max_attempts, _is_idempotent(method, idempotent))
+    return await AsyncRetrying(**options)(_asend, method, url, **kwargs)
+
+
+@contextmanager
+def stream(
+    method: str,
+    url: str,
+    *,
+    max_attempts: int | None = None,
+    idempotent: bool | None = None,
+    **kwargs: Any,
+) -> Iterator[httpx.Response]:
+    """Streaming variant of request(); retries only happen before the body starts flowing."""
+    attempts = max_attempts or get_config().http_max_attempts
+    idempotent = _is_idempotent(method, idempotent)
+    with _host_semaphore(url):
+        for attempt in range(1, attempts + 1):
+            stack = ExitStack()
+            try:
+                response = stack.enter_context(get_http_client().stream(method, url, **kwargs))
+            except httpx.TransportError as exc:
+                stack.close()
+                if attempt == attempts or not idempotent:
+                    raise
+                record_retry()
+                get_logger().warning("HTTP %s %s failed (%s); retry %d", method, url, exc, attempt)
+                time.sleep(min(30.0, 0.5 * 2 ** (attempt - 1)) + random.random())
+                continue
+            retry = _should_retry(response) if idempotent else _rejected(response)
+            if retry and attempt < attempts:
+                retry_after = response.headers.get("Retry-After", "")
+                stack.close()
+                record_retry()
+                get_logger().warning(
+                    "HTTP %s %s failed (HTTP %d); retry %d", method, url, response.status_code, attempt
+                )
+                delay = float(retry_after) if retry_after.isdigit() else 0.5 * 2 ** (attempt - 1)
+                time.sleep(min(delay, MAX_RETRY_AFTER) + random.random())
+                continue
+            try:
+                with stack:
+                    yield response
+            finally:
+                _record(response)
+            return
+
+
+async def aclose_http_client() -> None:
+    """Close the running loop's async client; call before a short-lived loop ends."""
+    client = _async_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+
+def close_http_clients() -> None:
+    if get_http_client.cache_info().currsize:
+        get_http_client().close()
+        get_http_client.cache_clear()
@@ -0,0 +1,206 @@
+from __future__ import annotations
+
+import os
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Callable
+
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from src.config import COLLECTION_JOBS, DB_NAME, get_logger, get_mongo_client
+
+STATUS_QUEUED = "queued"
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+RETRY_BACKOFF = timedelta(seconds=30)
+RETRY_BACKOFF_MAX = timedelta(minutes=30)
+
+
+def _owner_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+class JobQueue:
+    """Pipeline jobs in MongoDB, one document per topic (``_id`` is the topic hash).
+
+    A job names the stage it waits for. Workers take it with an atomic
+    ``find_one_and_update`` that sets a lease; while the stage runs the lease
+    is extended by heartbeats, and a worker that dies simply lets it expire so
+    another replica picks the job up. Results only count if the lease is still
+    held when the worker advances the job.
+    """
+
+    def __init__(self, lease: timedelta, max_attempts: int) -> None:
+        self.lease = lease
+        self.max_attempts = max_attempts
+        self.owner = _owner_id()
+
+    @property
+    def collection(self):
+        return get_mongo_client()[DB_NAME][COLLECTION_JOBS]
+
+    def enqueue(self, key: str, trend: dict, stage: str) -> bool:
+        """Queue a topic at ``stage``; False if the topic is already queued.
+
+        A finished or failed job is queued again. Its stages still reuse their
+        checkpoints, and the upload stage never posts a topic twice.
+        """
+        now = datetime.utcnow()
+        try:
+            # Matches only a settled job; a queued one makes the upsert collide on _id.
+            self.collection.update_one(
+                {"_id": key, "status": {"$in": [STATUS_DONE, STATUS_FAILED]}},
+                {
+                    "$set": {
+                        "trend": trend,
+                        "stage": stage,
+                        "status": STATUS_QUEUED,
+                        "attempts": 0,
+                        "available_at": now,
+                        "created_at": now,
+                    },
+                    "$unset": {"finished_at": "", "last_error": ""},
+                },
+                upsert=True,
+            )
+        except DuplicateKeyError:
+            return False
+        return True
+
+    def claim(self, stage: str) -> dict | None:
+        now = datetime.utcnow()
+        return self.collection.find_one_and_update(
+            {
+                "stage": stage,
+                "status": STATUS_QUEUED,
+                "available_at": {"$lte": now},
+                "attempts": {"$lt": self.max_attempts},
+                "$or": [{"lease_until": {"$exists": False}}, {"lease_until": {"$lt": now}}],
+            },
+            {
+                "$set": {"lease_owner": self.owner, "lease_until": now + self.lease, "claimed_at": now},
+                "$inc": {"attempts": 1},
+            },
+            sort=[("available_at", 1)],
+            return_document=ReturnDocument.AFTER,
+        )
+
+    def reap(self, stage: str) -> dict | None:
+        """Fail one job whose last allowed attempt died with its lease, so it stops looking queued."""
+        now = datetime.utcnow()
+        return self.collection.find_one_and_update(
+            {
+                "stage": stage,
+                "status": STATUS_QUEUED,
+                "attempts": {"$gte": self.max_attempts},
+                "lease_until": {"$lt": now},
+            },
+            {
+                "$set": {
+                    "status": STATUS_FAILED,
+                    "finished_at": now,
+                    "last_error": f"lease expired during attempt {self.max_attempts} of {stage}",
+                },
+                "$unset": {"lease_owner": "", "lease_until": ""},
+            },
+            return_document=ReturnDocument.AFTER,
+        )
+
+    def heartbeat(self, key: str) -> bool:
+        result = self.collection.update_one(
+            {"_id": key, "lease_owner": self.owner},
+            {"$set": {"lease_until": datetime.utcnow() + self.lease}},
+        )
+        return result.matched_count == 1
+
+    def advance(self, key: str, next_stage: str | None) -> bool:
+        """Hand the job to ``next_stage`` (or mark it done); False if the lease was lost."""
+        now = datetime.utcnow()
+        if next_stage is None:
+            update = {"status": STATUS_DONE, "finished_at": now}
+        else:
+            update = {"stage": next_stage, "attempts": 0, "available_at": now}
+        result = self.collection.update_one(
+            {"_id": key, "lease_owner": self.owner},
+            {"$set": update, "$unset": {"lease_owner": "", "lease_until": "", "last_error": ""}},
+        )
+        return result.modified_count == 1
+
+    def fail(self, key: str, error: BaseException, attempts: int) -> bool:
+        """Release the job for a later retry; True once it has run out of attempts."""
+        now = datetime.utcnow()
+        final = attempts >= self.max_attempts
+        update: dict = {"last_error": repr(error)}
+        if final:
+            update.update(status=STATUS_FAILED, finished_at=now)
+        else:
+            update["available_at"] = now + min(RETRY_BACKOFF * 2 ** (attempts - 1), RETRY_BACKOFF_MAX)
+        self.collection.update_one(
+            {"_id": key, "lease_owner": self.owner},
+            {"$set": update, "$unset": {"lease_owner": "", "lease_until": ""}},
+        )
+        return final
+
+    def status(self, keys: list[str]) -> dict[str, str]:
+        return {doc["_id"]: doc["status"] for doc in self.collection.find({"_id": {"$in": keys}}, {"status": 1})}
+
+    def pending_keys(self) -> set[str]:
+        return {doc["_id"] for doc in self.collection.find({"status": STATUS_QUEUED}, {"_id": 1})}
+
+    def acquire_tick(self, name: str, period: timedelta) -> bool:
+        """True for exactly one caller per ``period`` across all replicas."""
+        now = datetime.utcnow()
+        try:
+            # Matches only when the tick is due; otherwise the upsert collides on _id.
+            self.collection.update_one(
+                {"_id": f"tick:{name}", "next_tick_at": {"$lte": now}},
+                {"$set": {"next_tick_at": now + period, "lease_owner": self.owner}},
+                upsert=True,
+            )
+        except DuplicateKeyError:
+            return False
+        return True
+
+
+class Heartbeat:
+    """Keeps a lease alive from a background thread while the work it guards runs.
+
+    ``renew`` extends the lease and returns False once someone else holds it;
+    from then on ``lost`` is set and the work should stop at its next checkpoint.
+    """
+
+    def __init__(self, renew: Callable[[], bool], lease: timedelta, name: str) -> None:
+        self.renew = renew
+        self.lease = lease.total_seconds()
+        self.name = name
+        self.lost = False
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"lease-{name}", daemon=True)
+
+    def _run(self) -> None:
+        renewed = time.monotonic()
+        while not self._stop.wait(self.lease / 3):
+            try:
+                if self.renew():
+                    renewed = time.monotonic()
+                    continue
+                get_logger().warning("Lost the lease on %s", self.name)
+            except Exception as exc:
+                get_logger().warning("Heartbeat for %s failed: %s", self.name, exc)
+                # A missed beat is fine; the lease only lapses after several.
+                if time.monotonic() - renewed < self.lease:
+                    continue
+            self.lost = True
+            return
+
+    def __enter__(self) -> Heartbeat:
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._stop.set()
+        self._thread.join()
@@ -0,0 +1,220 @@
+from __future__ import annotations
+
+import resource
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Iterator
+
+from prometheus_client import Counter, Gauge, Histogram, start_http_server
+
+from src.config import COLLECTION_RUNS, DB_NAME, get_config, get_logger, get_mongo_client
+
+DURATION_BUCKETS = (0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1200)
+
+STAGE_SECONDS = Histogram(
+    "pipeline_stage_duration_seconds",
+    "Wall-clock time per pipeline stage.",
+    ["kind", "stage"],
+    buckets=DURATION_BUCKETS,
+)
+STAGE_CPU_SECONDS = Histogram(
+    "pipeline_stage_cpu_seconds",
+    "CPU time per pipeline stage, including child processes and pooled workers.",
+    ["kind", "stage"],
+    buckets=DURATION_BUCKETS,
+)
+# Process-wide only: stages run concurrently, so a per-stage peak cannot be isolated.
+PROCESS_PEAK_RSS = Gauge("process_peak_rss_bytes", "Peak resident memory of this process since it started.")
+STAGE_HTTP_BYTES = Counter(
+    "pipeline_stage_http_bytes",
+    "HTTP body bytes sent and received through the shared client, per stage.",
+    ["kind", "stage", "direction"],
+)
+STAGE_HTTP_RETRIES = Counter(
+    "pipeline_stage_http_retries",
+    "HTTP retries through the shared client, per stage.",
+    ["kind", "stage"],
+)
+STAGE_FAILURES = Counter("pipeline_stage_failures", "Stages that raised.", ["kind", "stage"])
+RUNS = Counter("pipeline_runs", "Finished runs by outcome.", ["kind", "status"])
+
+
+class _HTTPCounters:
+    """Process-wide HTTP totals; stages record the difference across their lifetime."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.retries = 0
+
+    def add(self, bytes_in: int = 0, bytes_out: int = 0, retries: int = 0) -> None:
+        with self._lock:
+            self.bytes_in += bytes_in
+            self.bytes_out += bytes_out
+            self.retries += retries
+
+    def snapshot(self) -> tuple[int, int, int]:
+        with self._lock:
+            return self.bytes_in, self.bytes_out, self.retries
+
+
+_http = _HTTPCounters()
+
+
+class _WorkerCPU:
+    """CPU seconds reported back by long-lived pool workers.
+
+    RUSAGE_CHILDREN only counts children that have exited, so a persistent pool
+    (the TTS workers) has to report its own usage per task.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.seconds = 0.0
+
+    def add(self, seconds: float) -> None:
+        with self._lock:
+            self.seconds += seconds
+
+    def snapshot(self) -> float:
+        with self._lock:
+            return self.seconds
+
+
+_worker_cpu = _WorkerCPU()
+
+
+def record_http(bytes_in: int, bytes_out: int) -> None:
+    _http.add(bytes_in=bytes_in, bytes_out=bytes_out)
+
+
+def record_retry() -> None:
+    _http.add(retries=1)
+
+
+def record_worker_cpu(seconds: float) -> None:
+    _worker_cpu.add(seconds)
+
+
+def _peak_rss_bytes() -> int:
+    try:
+        with open("/proc/self/status") as handle:
+            for line in handle:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _child_cpu() -> float:
+    """Exited children (ffmpeg, per-render segment pools) plus what pooled workers reported."""
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime + _worker_cpu.snapshot()
+
+
+@dataclass
+class StageMetrics:
+    stage: str
+    started_at: datetime
+    wall_s: float = 0.0
+    cpu_s: float = 0.0
+    # The process high-water mark when the stage ended, not the stage's own peak.
+    process_peak_rss_bytes: int = 0
+    bytes_in: int = 0
+    bytes_out: int = 0
+    retries: int = 0
+    status: str = "ok"
+    error: str | None = None
+
+
+class RunRecorder:
+    """Collects per-stage metrics for one run and stores them as one ``runs`` document.
+
+    Stages are measured in the calling thread, but CPU time and HTTP totals are
+    process-wide, so stages of overlapping runs can bleed into each other. Memory
+    is only reported as the process's peak so far.
+    """
+
+    def __init__(self, kind: str) -> None:
+        self.kind = kind
+        self.run_id = uuid.uuid4().hex
+        self.started_at = datetime.utcnow()
+        self.stages: list[StageMetrics] = []
+        self.fields: dict = {}
+        self._start = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[StageMetrics]:
+        metrics = StageMetrics(stage=name, started_at=datetime.utcnow())
+        bytes_in, bytes_out, retries = _http.snapshot()
+        wall, cpu, child_cpu = time.perf_counter(), time.process_time(), _child_cpu()
+        try:
+            yield metrics
+        except BaseException as exc:
+            metrics.status = "failed"
+            metrics.error = repr(exc)
+            STAGE_FAILURES.labels(self.kind, name).inc()
+            raise
+        finally:
+            metrics.wall_s = time.perf_counter() - wall
+            metrics.cpu_s = (time.process_time() - cpu) + (_child_cpu() - child_cpu)
+            metrics.process_peak_rss_bytes = _peak_rss_bytes()
+            now_in, now_out, now_retries = _http.snapshot()
+            metrics.bytes_in = now_in - bytes_in
+            metrics.bytes_out = now_out - bytes_out
+            metrics.retries = now_retries - retries
+            self.stages.append(metrics)
+            self._observe(metrics)
+
+    def _observe(self, metrics: StageMetrics) -> None:
+        labels = (self.kind, metrics.stage)
+        STAGE_SECONDS.labels(*labels).observe(metrics.wall_s)
+        STAGE_CPU_SECONDS.labels(*labels).observe(metrics.cpu_s)
+        PROCESS_PEAK_RSS.set(metrics.process_peak_rss_bytes)
+        STAGE_HTTP_BYTES.labels(*labels, "in").inc(metrics.bytes_in)
+        STAGE_HTTP_BYTES.labels(*labels, "out").inc(metrics.bytes_out)
+        STAGE_HTTP_RETRIES.labels(*labels).inc(metrics.retries)
+
+    def finish(self, status: str, error: str | None = None) -> dict:
+        logger = get_logger()
+        doc = {
+            "run_id": self.run_id,
+            "kind": self.kind,
+            "status": status,
+            "error": error,
+            "started_at": self.started_at,
+            "finished_at": datetime.utcnow(),
+            "wall_s": time.perf_counter() - self._start,
+            "stages": [asdict(stage) for stage in self.stages],
+            **self.fields,
+        }
+        RUNS.labels(self.kind, status).inc()
+        logger.info(
+            "Run %s (%s) %s in %.1fs: %s",
+            self.run_id,
+            self.kind,
+            status,
+            doc["wall_s"],
+            ", ".join(f"{stage.stage}={stage.wall_s:.1f}s" for stage in self.stages),
+        )
+        try:
+            get_mongo_client()[DB_NAME][COLLECTION_RUNS].insert_one(doc)
+        except Exception as exc:
+            # Losing a metrics record must never fail the run it describes.
+            logger.warning("Could not store run metrics: %s", exc)
+        return doc
+
+
+def start_metrics_server() -> None:
+    """Serve Prometheus text-format metrics on METRICS_HOST:METRICS_PORT (0 disables)."""
+    config = get_config()
+    if config.metrics_port <= 0:
+        return
+    start_http_server(config.metrics_port, addr=config.metrics_host)
+    get_logger().info("Metrics endpoint: http://%s:%d/metrics", config.metrics_host, config.metrics_port)
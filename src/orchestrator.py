@@ -1,159 +1,559 @@
 from __future__ import annotations
 
-import hashlib
-from datetime import datetime
+from datetime import datetime, timedelta
+from functools import lru_cache, partial
 from pathlib import Path
 import time
-
-from apscheduler.schedulers.background import BackgroundScheduler
+from typing import TYPE_CHECKING, Callable
 
 from src.config import (
     COLLECTION_POSTS,
     COLLECTION_SCRIPTS,
-    COLLECTION_TRENDS,
     COLLECTION_VIDEOS,
     DB_NAME,
     get_config,
     get_logger,
     get_mongo_client,
 )
-from src.scripts.generator import generate_script
-from src.trends.google_trends import fetch_google_trends
-from src.trends.reddit_trends import fetch_reddit_trends
-from src.trends.tiktok_trends import fetch_tiktok_trends
-from src.video.producer import produce_video
-from src.video.voiceover import VoiceoverGenerator
-from src.poster.uploader import post_video
+from src.cache import cache_key
+from src.db import ensure_indexes, topic_hash
+from src.jobs import Heartbeat, JobQueue
+from src.metrics import RunRecorder, start_metrics_server
+from src.pipeline import DistributedPipeline, PipelineJob, Stage, StagedPipeline
+from src.run_state import RunState, exhausted_runs, file_sha256, resumable_runs
 
-OUTPUT_DIR = Path("output")
-ASSETS_DIR = Path("assets")
+# Stage dependencies (moviepy, Kokoro, pytrends, praw, ...) are imported where they are
+# used, so a process that only runs one stage never pays for the others.
+if TYPE_CHECKING:
+    from apscheduler.schedulers.background import BackgroundScheduler
 
+    from src.trends.scorer import TrendSignal
 
-def _topic_hash(topic: str) -> str:
-    return hashlib.sha256(topic.lower().encode("utf-8")).hexdigest()
+OUTPUT_DIR = Path("output")
+ASSETS_DIR = Path("assets")
+# Set on a topic's posts document from the moment the upload stage claims it.
+STATUS_POSTING = "POSTING"
+# Replicas' clocks and scheduler start times drift; a tick may come this much early.
+TICK_MARGIN = timedelta(minutes=5)
 
 
-def store_trends(trends: list[dict]) -> None:
-    client = get_mongo_client()
-    collection = client[DB_NAME][COLLECTION_TRENDS]
-    if trends:
-        collection.insert_many(trends)
+def _trend_doc(signal: TrendSignal) -> dict:
+    return {
+        "topic": signal.topic,
+        "source": signal.source,
+        "score": signal.score,
+        "raw": signal.raw,
+        "detected_at": signal.detected_at,
+    }
 
 
 def detect_trends() -> list[dict]:
-    logger = get_logger()
-    signals = [
-        *fetch_google_trends(),
-        *fetch_reddit_trends(),
-        *fetch_tiktok_trends(),
-    ]
-    signals.sort(key=lambda s: s.score, reverse=True)
+    from src.trends.clustering import cluster_signals
+    from src.trends.collector import collect_signals
+    from src.trends.store import store_signals
 
-    trends = [
-        {
-            "topic": signal.topic,
-            "source": signal.source,
-            "score": signal.score,
-            "raw": signal.raw,
-            "detected_at": signal.detected_at,
-        }
-        for signal in signals
-    ]
+    logger = get_logger()
+    run = RunRecorder("detect")
+    try:
+        with run.stage("collect"):
+            signals = collect_signals()
+        with run.stage("store"):
+            store_signals(signals)
+        with run.stage("cluster"):
+            topics = cluster_signals(signals)
+            topics.sort(key=lambda s: s.score, reverse=True)
+            trends = [_trend_doc(topic) for topic in topics]
+    except Exception as exc:
+        run.finish("failed", repr(exc))
+        raise
 
-    store_trends(trends)
-    logger.info("Detected %d trend signals", len(trends))
+    logger.info("Detected %d trend signals in %d topics", len(signals), len(trends))
+    run.fields.update(signals=len(signals), topics=len(trends))
+    run.finish("ok")
     return trends
 
 
-def select_trend(trends: list[dict]) -> dict | None:
+def select_trends(trends: list[dict], limit: int, exclude: set[str] | None = None) -> list[dict]:
+    """Top ``limit`` trends that were never posted, have attempts left and are not in ``exclude``."""
+    if not trends or limit <= 0:
+        return []
     client = get_mongo_client()
     collection = client[DB_NAME][COLLECTION_POSTS]
 
-    for trend in trends:
-        topic_hash = _topic_hash(trend["topic"])
-        if collection.find_one({"topic_hash": topic_hash}):
-            continue
-        return trend
-    return None
+    hashes = [topic_hash(trend["topic"]) for trend in trends]
+    skip = set(exclude or ())
+    skip.update(
+        doc["topic_hash"]
+        for doc in collection.find({"topic_hash": {"$in": hashes}}, {"topic_hash": 1, "_id": 0})
+    )
+    # Otherwise a topic that keeps failing is picked again on every tick.
+    skip.update(exhausted_runs(hashes, get_config().pipeline_max_attempts))
+    selected = []
+    for trend, trend_hash in zip(trends, hashes):
+        if trend_hash not in skip:
+            selected.append(trend)
+            skip.add(trend_hash)
+            if len(selected) == limit:
+                break
+    return selected
 
 
-def run_pipeline() -> None:
-    logger = get_logger()
-    config = get_config()
-    client = get_mongo_client()
+def select_trend(trends: list[dict]) -> dict | None:
+    selected = select_trends(trends, 1)
+    return selected[0] if selected else None
 
-    logger.info("Pipeline run started")
-    try:
-        trends = detect_trends()
-        trend = select_trend(trends)
-        if not trend:
-            logger.warning("No new trends available.")
-            return
 
-        script = generate_script(trend["topic"])
-        script_doc = {
-            **script,
-            "topic": trend["topic"],
+def _voice_key(voice: str, script: dict) -> str:
+    return cache_key("voice", voice, script["narration"])
+
+
+def _store_script(job: PipelineJob, script: dict) -> None:
+    job.data["script"] = script
+    script_doc = {
+        **script,
+        "topic": job.trend["topic"],
+        "created_at": datetime.utcnow(),
+    }
+    get_mongo_client()[DB_NAME][COLLECTION_SCRIPTS].insert_one(script_doc)
+    job.data["state"].complete("script", script=script)
+
+
+def _resume_script(job: PipelineJob) -> bool:
+    record = job.data["state"].completed("script")
+    if record is None:
+        return False
+    job.data["script"] = record["script"]
+    return True
+
+
+def _script_for(job: PipelineJob) -> dict:
+    """The job's script, read from its checkpoint when an earlier stage ran on another node."""
+    if "script" not in job.data and not _resume_script(job):
+        raise RuntimeError(f"No script checkpoint for {job.trend['topic']}")
+    return job.data["script"]
+
+
+def _script_stage(job: PipelineJob) -> None:
+    from src.scripts.generator import generate_script
+
+    if not _resume_script(job):
+        _store_script(job, generate_script(job.trend["topic"]))
+
+
+def _voice_stage(job: PipelineJob) -> None:
+    from src.video.voiceover import VoiceoverGenerator
+
+    state = job.data["state"]
+    script = _script_for(job)
+    voice = VoiceoverGenerator()
+    key = _voice_key(voice.voice, script)
+    if state.completed("voice", key) is not None:
+        return
+    voice.synthesize(script["narration"], job.data["audio_path"])
+    state.complete("voice", key, artifacts={"audio": job.data["audio_path"]})
+
+
+def _script_voice_stage(job: PipelineJob) -> None:
+    from src.scripts.generator import stream_script
+    from src.video.voiceover import VoiceoverGenerator
+
+    if _resume_script(job):
+        _voice_stage(job)
+        return
+    # Voiceover starts on the first narration sentence while the LLM is still writing.
+    voice = VoiceoverGenerator()
+    stream = stream_script(job.trend["topic"])
+    voice.synthesize_stream(stream, job.data["audio_path"])
+    _store_script(job, stream.script)
+    job.data["state"].complete(
+        "voice",
+        _voice_key(voice.voice, stream.script),
+        artifacts={"audio": job.data["audio_path"]},
+    )
+
+
+def _render_stage(job: PipelineJob) -> None:
+    from src.video.producer import produce_video
+
+    config = get_config()
+    state = job.data["state"]
+    script = _script_for(job)
+    video_path = job.data["video_path"]
+    key = cache_key(
+        "render",
+        {field: script.get(field) for field in ("hook", "body_points", "narration")},
+        file_sha256(job.data["audio_path"]),
+        config.video_engine,
+        config.video_background,
+    )
+    if state.completed("render", key) is not None:
+        return
+
+    video_result = produce_video(script, job.data["audio_path"], video_path, ASSETS_DIR)
+    state.complete("render", key, artifacts={"video": video_result.video_path})
+
+    get_mongo_client()[DB_NAME][COLLECTION_VIDEOS].insert_one(
+        {
+            "topic": job.trend["topic"],
+            "video_path": str(video_result.video_path),
+            "duration": video_result.duration,
             "created_at": datetime.utcnow(),
         }
-        client[DB_NAME][COLLECTION_SCRIPTS].insert_one(script_doc)
+    )
+
 
-        voice = VoiceoverGenerator()
-        audio_path = OUTPUT_DIR / f"{_topic_hash(trend['topic'])}.wav"
-        voice.synthesize(script["narration"], audio_path)
+def _claim_post(job: PipelineJob, owner: str, lease: timedelta) -> dict:
+    """Claim the topic's single posts document for ``owner``, creating it on first use.
 
-        video_path = OUTPUT_DIR / f"{_topic_hash(trend['topic'])}.mp4"
-        video_result = produce_video(script, audio_path, video_path, ASSETS_DIR)
+    The claim succeeds only while the topic is unposted and nobody else holds a
+    live claim; the unique topic_hash index turns every other case into a
+    duplicate key error instead of a second document. Returns the claimed
+    document, or the existing one when the topic is already posted.
+    """
+    from pymongo import ReturnDocument
+    from pymongo.errors import DuplicateKeyError
 
-        client[DB_NAME][COLLECTION_VIDEOS].insert_one(
+    collection = get_mongo_client()[DB_NAME][COLLECTION_POSTS]
+    now = datetime.utcnow()
+    try:
+        return collection.find_one_and_update(
             {
-                "topic": trend["topic"],
-                "video_path": str(video_result.video_path),
-                "duration": video_result.duration,
-                "created_at": datetime.utcnow(),
-            }
+                "topic_hash": job.key,
+                "publish_id": {"$exists": False},
+                "$or": [
+                    {"posting_owner": {"$exists": False}},
+                    {"posting_owner": owner},
+                    {"posting_until": {"$lt": now}},
+                ],
+            },
+            {
+                "$set": {"posting_owner": owner, "posting_until": now + lease},
+                "$setOnInsert": {
+                    "topic": job.trend["topic"],
+                    "status": STATUS_POSTING,
+                    "created_at": now,
+                    "privacy": get_config().post_privacy,
+                },
+            },
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
         )
+    except DuplicateKeyError:
+        post = collection.find_one({"topic_hash": job.key})
+        if post is not None and post.get("publish_id"):
+            return post
+        raise RuntimeError(
+            f"{job.trend['topic']} is being posted by {post and post.get('posting_owner')}"
+        ) from None
 
-        title = f\"{script['hook']} #{' #'.join(script['hashtags'])}\"
-        upload_result = post_video(video_path, title=title)
 
-        client[DB_NAME][COLLECTION_POSTS].insert_one(
-            {
-                "topic": trend["topic"],
-                "topic_hash": _topic_hash(trend["topic"]),
-                "publish_id": upload_result.publish_id,
-                "status": upload_result.status,
-                "created_at": datetime.utcnow(),
-                "privacy": config.post_privacy,
-            }
+def _renew_post_claim(post_id, owner: str, lease: timedelta) -> bool:
+    result = get_mongo_client()[DB_NAME][COLLECTION_POSTS].update_one(
+        {"_id": post_id, "posting_owner": owner},
+        {"$set": {"posting_until": datetime.utcnow() + lease}},
+    )
+    return result.matched_count == 1
+
+
+def _upload_stage(job: PipelineJob) -> None:
+    from src.poster.uploader import post_video
+
+    logger = get_logger()
+    # The claim is only exclusive behind posts.topic_hash_unique; raises while it is missing.
+    ensure_indexes()
+    queue = get_job_queue()
+    post = _claim_post(job, queue.owner, queue.lease)
+    if post.get("publish_id"):
+        logger.info("Topic %s was already posted as %s", job.trend["topic"], post["publish_id"])
+        return
+
+    state = job.data["state"]
+    record = state.completed("upload")
+    if record is None:
+        script = _script_for(job)
+        title = f"{script['hook']} #{' #'.join(script['hashtags'])}"
+        job_lease = job.data.get("lease")
+        renew = partial(_renew_post_claim, post["_id"], queue.owner, queue.lease)
+        # Stop between chunks once either lease is gone; whoever takes over resumes the
+        # same upload session (and publish_id) instead of starting a second post.
+        with Heartbeat(renew, queue.lease, f"post {job.key}") as claim:
+            upload_result = post_video(
+                job.data["video_path"],
+                title=title,
+                keep_going=lambda: not claim.lost and not (job_lease is not None and job_lease.lost),
+            )
+        record = state.complete("upload", publish_id=upload_result.publish_id, status=upload_result.status)
+
+    result = get_mongo_client()[DB_NAME][COLLECTION_POSTS].update_one(
+        {"_id": post["_id"], "posting_owner": queue.owner, "publish_id": {"$exists": False}},
+        {
+            "$set": {
+                "publish_id": record["publish_id"],
+                "status": record["status"],
+                # Picked up by track_publish_status until TikTok reports a final state.
+                "next_check_at": datetime.utcnow(),
+                "status_checks": 0,
+            },
+            "$unset": {"posting_owner": "", "posting_until": ""},
+        },
+    )
+    if result.matched_count == 0:
+        raise RuntimeError(f"Lost the post claim for {job.trend['topic']} after uploading {record['publish_id']}")
+    logger.info("Pipeline finished for topic: %s", job.trend["topic"])
+
+
+def _finish_job(job: PipelineJob) -> None:
+    state = job.data["state"]
+    if job.error is None:
+        state.finish()
+        return
+    state.fail(job.error)
+    # Give up this worker's post claim unless TikTok already accepted the video. A claim
+    # held by another worker (the reason this job may have failed) is left alone.
+    get_mongo_client()[DB_NAME][COLLECTION_POSTS].delete_one(
+        {"topic_hash": job.key, "publish_id": {"$exists": False}, "posting_owner": get_job_queue().owner}
+    )
+
+
+def build_stages() -> list[Stage]:
+    config = get_config()
+    if config.llm_streaming:
+        front = [Stage("script_voice", _script_voice_stage, config.pipeline_script_workers)]
+    else:
+        front = [
+            Stage("script", _script_stage, config.pipeline_script_workers),
+            Stage("voice", _voice_stage, config.pipeline_voice_workers),
+        ]
+    return [
+        *front,
+        Stage("render", _render_stage, config.pipeline_render_workers),
+        Stage("upload", _upload_stage, config.pipeline_upload_workers),
+    ]
+
+
+def _worker_stages() -> set[str] | None:
+    stages = {name.strip() for name in get_config().worker_stages.split(",") if name.strip()}
+    return stages or None
+
+
+@lru_cache(maxsize=1)
+def get_job_queue() -> JobQueue:
+    config = get_config()
+    return JobQueue(timedelta(seconds=config.job_lease_seconds), config.pipeline_max_attempts)
+
+
+@lru_cache(maxsize=1)
+def get_pipeline() -> StagedPipeline | DistributedPipeline:
+    config = get_config()
+    if config.pipeline_backend == "mongo":
+        pipeline = DistributedPipeline(
+            build_stages(),
+            get_job_queue(),
+            make_job=_queued_job,
+            on_finish=_finish_job,
+            local_stages=_worker_stages(),
+            poll_interval=config.job_poll_seconds,
+        )
+    elif config.pipeline_backend == "local":
+        pipeline = StagedPipeline(
+            build_stages(),
+            queue_size=config.pipeline_queue_size,
+            on_finish=_finish_job,
         )
+    else:
+        raise ValueError(f"Unknown pipeline backend: {config.pipeline_backend}")
+    pipeline.start()
+    return pipeline
+
+
+def _job(key: str, trend: dict, state: RunState) -> PipelineJob:
+    run = RunRecorder("pipeline")
+    run.fields.update(topic=trend["topic"], attempt=state.doc["attempts"])
+    return PipelineJob(
+        key=key,
+        trend=trend,
+        run=run,
+        data={
+            "state": state,
+            "audio_path": OUTPUT_DIR / f"{key}.wav",
+            # Under output/, which replicas share, so any node can upload what another rendered.
+            "video_path": OUTPUT_DIR / f"{key}.mp4",
+        },
+    )
+
+
+def _new_job(trend: dict) -> PipelineJob:
+    key = topic_hash(trend["topic"])
+    return _job(key, trend, RunState.start(key, trend))
+
+
+def _queued_job(doc: dict) -> PipelineJob:
+    job = _job(doc["_id"], doc["trend"], RunState.load(doc["_id"]))
+    job.run.fields["stage"] = doc["stage"]
+    return job
+
+
+def _pipeline_interval_hours() -> int:
+    return max(1, int(24 / max(get_config().posts_per_day, 1)))
+
+
+def _tick_period(interval: timedelta) -> timedelta:
+    # A little under the interval, so scheduler jitter on the winning replica never skips one.
+    return interval - min(TICK_MARGIN, interval / 10)
+
+
+def _on_one_replica(name: str, interval: timedelta, func: Callable[[], object]) -> Callable[[], None]:
+    """Wrap a scheduled job so that with the mongo backend one replica runs it per interval."""
+
+    def run() -> None:
+        if get_config().pipeline_backend == "mongo" and not get_job_queue().acquire_tick(
+            name, _tick_period(interval)
+        ):
+            get_logger().debug("Another replica already ran %s this interval", name)
+            return
+        func()
 
-        logger.info("Pipeline run finished")
+    return run
+
+
+def run_pipeline(wait: bool = True) -> None:
+    """Detect trends and feed the best unposted topics into the staged pipeline.
+
+    With ``wait=False`` (the scheduled job) this returns once the topics are queued,
+    so the next interval can start scripting while earlier videos still render.
+    """
+    logger = get_logger()
+    config = get_config()
+
+    logger.info("Pipeline run started")
+    try:
+        ensure_indexes()
+        pipeline = get_pipeline()
+        distributed = isinstance(pipeline, DistributedPipeline)
+        # Every replica schedules this job; only one of them picks topics per interval.
+        period = _tick_period(timedelta(hours=_pipeline_interval_hours()))
+        if distributed and not wait and not get_job_queue().acquire_tick("pipeline", period):
+            logger.info("Another replica already queued topics for this interval")
+            return
+        in_flight = pipeline.in_flight()
+        # Unfinished runs go first: they resume from their last checkpoint. Jobs in the
+        # shared queue retry on their own, so there is nothing to resume there.
+        selected = []
+        if not distributed:
+            selected = [
+                doc["trend"]
+                for doc in resumable_runs(
+                    config.pipeline_topics_per_run, config.pipeline_max_attempts, exclude=in_flight
+                )
+            ]
+        if selected:
+            logger.info("Resuming %d unfinished runs", len(selected))
+        slots = config.pipeline_topics_per_run - len(selected)
+        if slots > 0:
+            exclude = in_flight | {topic_hash(trend["topic"]) for trend in selected}
+            selected += select_trends(detect_trends(), slots, exclude=exclude)
+        if not selected:
+            logger.warning("No new trends available.")
+            return
+
+        for trend in selected:
+            pipeline.submit(_new_job(trend))
+        logger.info("Queued %d topics: %s", len(selected), ", ".join(t["topic"] for t in selected))
+        if wait:
+            pipeline.join()
     except Exception as exc:
         logger.exception("Pipeline run failed: %s", exc)
 
 
 def schedule_jobs() -> BackgroundScheduler:
+    from apscheduler.schedulers.background import BackgroundScheduler
+
+    from src.poster.status_tracker import track_publish_status
+
     logger = get_logger()
     scheduler = BackgroundScheduler()
 
-    scheduler.add_job(detect_trends, "interval", hours=6, id="trend_detection")
-
-    interval_hours = max(1, int(24 / max(get_config().posts_per_day, 1)))
-    scheduler.add_job(run_pipeline, "interval", hours=interval_hours, id="pipeline")
+    # Every replica runs this scheduler. Detection moves shared Reddit baselines and trend
+    # buckets, and status checks update shared posts, so each runs on one replica per tick.
+    detection_interval = timedelta(hours=6)
+    scheduler.add_job(
+        _on_one_replica("trend_detection", detection_interval, detect_trends),
+        "interval",
+        seconds=detection_interval.total_seconds(),
+        id="trend_detection",
+    )
+
+    interval_hours = _pipeline_interval_hours()
+    scheduler.add_job(
+        run_pipeline,
+        "interval",
+        hours=interval_hours,
+        id="pipeline",
+        kwargs={"wait": False},
+    )
+
+    status_interval = timedelta(seconds=get_config().publish_status_interval)
+    scheduler.add_job(
+        _on_one_replica("publish_status", status_interval, track_publish_status),
+        "interval",
+        seconds=status_interval.total_seconds(),
+        id="publish_status",
+        max_instances=1,
+        coalesce=True,
+    )
 
     scheduler.start()
     logger.info("Scheduler started: trends every 6h, pipeline every %dh", interval_hours)
     return scheduler
 
 
+def run_worker(stages: set[str] | None = None) -> None:
+    """Work on pipeline stages from the shared job queue without scheduling anything.
+
+    Extra replicas (or render-only machines, with ``stages={"render"}``) run this
+    next to a scheduler that uses ``PIPELINE_BACKEND=mongo``.
+    """
+    config = get_config()
+    start_metrics_server()
+    ensure_indexes()
+    stages = stages or _worker_stages()
+    pipeline = DistributedPipeline(
+        build_stages(),
+        get_job_queue(),
+        make_job=_queued_job,
+        on_finish=_finish_job,
+        local_stages=stages,
+        poll_interval=config.job_poll_seconds,
+    )
+    if stages is None or stages & {"voice", "script_voice"}:
+        from src.video.voiceover import enable_tts_pool, get_tts_engine
+
+        enable_tts_pool()
+        get_tts_engine().warm()
+    pipeline.start()
+    get_logger().info("Worker started for stages: %s", ", ".join(sorted(stages)) if stages else "all")
+    try:
+        while True:
+            time.sleep(60)
+    except KeyboardInterrupt:
+        get_logger().info("Shutting down")
+        pipeline.shutdown()
+
+
 def main() -> None:
+    from src.video.voiceover import enable_tts_pool, get_tts_engine
+
+    start_metrics_server()
+    ensure_indexes()
+    enable_tts_pool()
+    get_tts_engine().warm()
     schedule_jobs()
     try:
         while True:
             time.sleep(60)
     except KeyboardInterrupt:
         get_logger().info("Shutting down")
+        get_pipeline().shutdown()
 
 
 if __name__ == "__main__":
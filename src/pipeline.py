@@ -0,0 +1,277 @@
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from functools import partial
+from typing import Any, Callable
+
+from src.config import get_logger
+from src.jobs import STATUS_QUEUED, Heartbeat, JobQueue
+from src.metrics import RunRecorder
+
+
+@dataclass
+class PipelineJob:
+    """One topic moving through the stages; stages read and fill in the fields they need."""
+
+    key: str
+    trend: dict
+    run: RunRecorder
+    data: dict[str, Any] = field(default_factory=dict)
+    error: BaseException | None = None
+    done: threading.Event = field(default_factory=threading.Event)
+
+
+@dataclass(frozen=True)
+class Stage:
+    name: str
+    func: Callable[[PipelineJob], None]
+    workers: int = 1
+
+
+class StagedPipeline:
+    """Worker threads per stage, connected by bounded queues.
+
+    Each stage has its own concurrency, and a full queue blocks the stage feeding
+    it, so a slow render holds back script generation instead of piling up audio.
+    Heavy work happens in subprocesses (ffmpeg, TTS pool, segment renderers), so
+    threads are enough to keep every stage busy at once.
+    """
+
+    def __init__(
+        self,
+        stages: list[Stage],
+        queue_size: int = 2,
+        on_finish: Callable[[PipelineJob], None] | None = None,
+    ) -> None:
+        if not stages:
+            raise ValueError("A pipeline needs at least one stage.")
+        self.stages = stages
+        self.on_finish = on_finish
+        self._queues: list[queue.Queue[PipelineJob | None]] = [
+            queue.Queue(maxsize=max(1, queue_size)) for _ in stages
+        ]
+        self._threads: list[threading.Thread] = []
+        self._in_flight: set[str] = set()
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        for position, stage in enumerate(self.stages):
+            for index in range(max(1, stage.workers)):
+                thread = threading.Thread(
+                    target=self._work,
+                    args=(position,),
+                    name=f"pipeline-{stage.name}-{index}",
+                    daemon=True,
+                )
+                thread.start()
+                self._threads.append(thread)
+
+    def in_flight(self) -> set[str]:
+        with self._lock:
+            return set(self._in_flight)
+
+    def submit(self, job: PipelineJob) -> None:
+        """Queue a job for the first stage; blocks while that stage is backed up."""
+        with self._lock:
+            self._in_flight.add(job.key)
+        self._queues[0].put(job)
+
+    def _finish(self, job: PipelineJob) -> None:
+        if self.on_finish is not None:
+            try:
+                self.on_finish(job)
+            except Exception as exc:
+                get_logger().exception("Pipeline finish hook failed for %s: %s", job.key, exc)
+        if job.error is None:
+            job.run.finish("ok")
+        else:
+            job.run.finish("failed", repr(job.error))
+        with self._lock:
+            self._in_flight.discard(job.key)
+        job.done.set()
+
+    def _work(self, position: int) -> None:
+        logger = get_logger()
+        stage = self.stages[position]
+        inbox = self._queues[position]
+        outbox = self._queues[position + 1] if position + 1 < len(self._queues) else None
+        while True:
+            job = inbox.get()
+            if job is None:
+                inbox.task_done()
+                return
+            try:
+                with job.run.stage(stage.name):
+                    stage.func(job)
+            except Exception as exc:
+                logger.exception("Stage %s failed for %s: %s", stage.name, job.trend.get("topic"), exc)
+                job.error = exc
+            try:
+                if outbox is not None and job.error is None:
+                    # Hand over before task_done so join() never sees a job between stages.
+                    outbox.put(job)
+                else:
+                    self._finish(job)
+            finally:
+                inbox.task_done()
+
+    def join(self) -> None:
+        """Block until every submitted job has left the last stage."""
+        for inbox in self._queues:
+            inbox.join()
+
+    def shutdown(self, wait: bool = True) -> None:
+        for position, stage in enumerate(self.stages):
+            for _ in range(max(1, stage.workers)):
+                self._queues[position].put(None)
+            if wait:
+                self._queues[position].join()
+        if wait:
+            for thread in self._threads:
+                thread.join()
+
+
+class DistributedPipeline:
+    """The same stages, connected through the MongoDB job queue instead of in-process queues.
+
+    Any number of replicas can run one: each starts workers only for the stages
+    in ``local_stages`` (so a render-only node takes nothing but render jobs),
+    claims jobs under a lease, and hands them to the next stage through the
+    queue. Jobs are rebuilt from their document with ``make_job``, since the
+    previous stage may have run on another machine.
+    """
+
+    def __init__(
+        self,
+        stages: list[Stage],
+        queue: JobQueue,
+        make_job: Callable[[dict], PipelineJob],
+        on_finish: Callable[[PipelineJob], None] | None = None,
+        local_stages: set[str] | None = None,
+        poll_interval: float = 5.0,
+    ) -> None:
+        if not stages:
+            raise ValueError("A pipeline needs at least one stage.")
+        unknown = (local_stages or set()) - {stage.name for stage in stages}
+        if unknown:
+            raise ValueError(f"Unknown pipeline stages: {', '.join(sorted(unknown))}")
+        self.stages = stages
+        self.queue = queue
+        self.make_job = make_job
+        self.on_finish = on_finish
+        self.local_stages = local_stages
+        self.poll_interval = poll_interval
+        self._threads: list[threading.Thread] = []
+        self._submitted: set[str] = set()
+        self._stop = threading.Event()
+
+    def start(self) -> None:
+        for position, stage in enumerate(self.stages):
+            if self.local_stages is not None and stage.name not in self.local_stages:
+                continue
+            for index in range(max(1, stage.workers)):
+                thread = threading.Thread(
+                    target=self._work,
+                    args=(position,),
+                    name=f"pipeline-{stage.name}-{index}",
+                    daemon=True,
+                )
+                thread.start()
+                self._threads.append(thread)
+
+    def in_flight(self) -> set[str]:
+        return self.queue.pending_keys()
+
+    def submit(self, job: PipelineJob) -> None:
+        """Queue a job for the first stage; a topic already queued by any replica is skipped."""
+        if self.queue.enqueue(job.key, job.data["state"].doc["trend"], self.stages[0].name):
+            self._submitted.add(job.key)
+        else:
+            get_logger().info("Topic %s is already queued; skipping", job.trend.get("topic"))
+
+    def _finish(self, job: PipelineJob) -> None:
+        if self.on_finish is None:
+            return
+        try:
+            self.on_finish(job)
+        except Exception as exc:
+            get_logger().exception("Pipeline finish hook failed for %s: %s", job.key, exc)
+
+    def _work(self, position: int) -> None:
+        stage = self.stages[position]
+        while not self._stop.is_set():
+            try:
+                worked = self._step(position)
+            except Exception as exc:
+                # Keep the worker alive; a job it held is retried once its lease lapses.
+                get_logger().exception("Pipeline worker for %s failed: %s", stage.name, exc)
+                worked = False
+            if not worked:
+                self._stop.wait(self.poll_interval)
+
+    def _step(self, position: int) -> bool:
+        """Settle or run one job for the stage; False when there was nothing to do."""
+        logger = get_logger()
+        stage = self.stages[position]
+        next_stage = self.stages[position + 1].name if position + 1 < len(self.stages) else None
+
+        expired = self.queue.reap(stage.name)
+        if expired is not None:
+            job = self.make_job(expired)
+            job.error = RuntimeError(expired["last_error"])
+            logger.warning("Giving up on %s: %s", job.trend.get("topic"), expired["last_error"])
+            self._finish(job)
+            job.run.finish("failed", repr(job.error))
+            return True
+
+        doc = self.queue.claim(stage.name)
+        if doc is None:
+            return False
+        try:
+            job = self.make_job(doc)
+        except Exception as exc:
+            logger.exception("Could not load job %s for %s: %s", doc["_id"], stage.name, exc)
+            self.queue.fail(doc["_id"], exc, doc["attempts"])
+            return True
+
+        lease = Heartbeat(partial(self.queue.heartbeat, job.key), self.queue.lease, f"job {job.key}")
+        # Stages that act outside the pipeline (uploads) check this before and while they do.
+        job.data["lease"] = lease
+        with lease:
+            try:
+                with job.run.stage(stage.name):
+                    stage.func(job)
+            except Exception as exc:
+                logger.exception("Stage %s failed for %s: %s", stage.name, job.trend.get("topic"), exc)
+                job.error = exc
+
+        if job.error is not None:
+            if self.queue.fail(job.key, job.error, doc["attempts"]):
+                self._finish(job)
+            job.run.finish("failed", repr(job.error))
+        elif self.queue.advance(job.key, next_stage):
+            if next_stage is None:
+                self._finish(job)
+            job.run.finish("ok")
+        else:
+            # The lease expired mid-stage and another worker owns the job now.
+            logger.warning("Dropping %s result for %s after losing its lease", stage.name, job.key)
+            job.run.finish("lost_lease")
+        return True
+
+    def join(self) -> None:
+        """Block until every job submitted here is done or has failed, wherever it ran."""
+        while self._submitted:
+            statuses = self.queue.status(list(self._submitted))
+            self._submitted -= {key for key, status in statuses.items() if status != STATUS_QUEUED}
+            if self._submitted:
+                time.sleep(self.poll_interval)
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._stop.set()
+        if wait:
+            for thread in self._threads:
+                thread.join()
@@ -5,19 +5,32 @@ import hashlib
 import http.server
 import json
 import os
+import socket
 import socketserver
 import threading
+import time
 import urllib.parse
+import uuid
 from dataclasses import dataclass
 from datetime import datetime, timedelta
+from functools import lru_cache
 from typing import Optional
 
-import httpx
-
 from src.config import get_config, get_logger, get_mongo_client, DB_NAME, COLLECTION_POSTS
+from src.http_client import request
 
 AUTH_BASE_URL = "https://www.tiktok.com/v2/auth/authorize/"
 TOKEN_URL = "https://open.tiktokapis.com/v2/oauth/token/"
+# A token this close to expiry is refreshed before use.
+REFRESH_MARGIN = timedelta(minutes=5)
+# Inside this window a cached token is still served, but refreshed in the background.
+PROACTIVE_REFRESH = timedelta(minutes=30)
+TOKEN_TIMEOUT = 30.0
+# How long one replica may hold the refresh lease before others may take over. The
+# refresh is a single request (a retry could replay a rotated refresh token), so the
+# lease comfortably outlasts its timeout plus storing the new token.
+REFRESH_LEASE = timedelta(seconds=TOKEN_TIMEOUT * 3)
+LEASE_POLL_SECONDS = 1.0
 
 
 @dataclass
@@ -85,7 +98,7 @@ def exchange_code_for_token(code: str) -> OAuthToken:
         "code_verifier": _pkce_verifier,
     }
 
-    response = httpx.post(TOKEN_URL, data=data, timeout=30)
+    response = request("POST", TOKEN_URL, data=data, timeout=TOKEN_TIMEOUT)
     response.raise_for_status()
     payload = response.json()
 
@@ -115,7 +128,7 @@ def refresh_access_token(refresh_token: str) -> OAuthToken:
         "grant_type": "refresh_token",
         "refresh_token": refresh_token,
     }
-    response = httpx.post(TOKEN_URL, data=data, timeout=30)
+    response = request("POST", TOKEN_URL, data=data, timeout=TOKEN_TIMEOUT, max_attempts=1)
     response.raise_for_status()
     payload = response.json()
     if "data" not in payload:
@@ -144,7 +157,8 @@ def store_token(token: OAuthToken) -> None:
                 "expires_at": token.expires_at,
                 "scope": token.scope,
                 "updated_at": datetime.utcnow(),
-            }
+            },
+            "$unset": {"refresh_lease_until": "", "refresh_lease_owner": ""},
         },
         upsert=True,
     )
@@ -163,20 +177,119 @@ def load_token() -> Optional[OAuthToken]:
     )
 
 
-def ensure_token(scopes: list[str]) -> OAuthToken:
-    logger = get_logger()
-    token = load_token()
-    if token and token.expires_at > datetime.utcnow() + timedelta(minutes=5):
-        return token
+def _usable(token: Optional[OAuthToken], margin: timedelta = REFRESH_MARGIN) -> bool:
+    return token is not None and token.expires_at > datetime.utcnow() + margin
+
+
+class TokenCache:
+    """Process-wide access token cache with single-flight refresh.
+
+    Fresh tokens are served from memory without touching MongoDB. A refresh
+    happens once per process (a lock) and once across replicas (a lease on the
+    token document), because TikTok rotates the refresh token and a second,
+    concurrent refresh would use a revoked one.
+    """
+
+    def __init__(self) -> None:
+        self._tokens: dict[tuple[str, ...], OAuthToken] = {}
+        self._lock = threading.Lock()
+        self._owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+    def get(self, scopes: list[str]) -> OAuthToken:
+        key = tuple(sorted(scopes))
+        token = self._tokens.get(key)
+        if _usable(token):
+            if not _usable(token, PROACTIVE_REFRESH):
+                self._refresh_in_background(key)
+            return token
+
+        with self._lock:
+            token = self._tokens.get(key)
+            if not _usable(token):
+                token = self._load_or_refresh()
+                self._store(key, token)
+            return token
+
+    def clear(self) -> None:
+        with self._lock:
+            self._tokens.clear()
+
+    def _store(self, key: tuple[str, ...], token: OAuthToken) -> None:
+        # One token serves every scope set; drop entries holding an older one.
+        self._tokens = {k: v for k, v in self._tokens.items() if v.access_token == token.access_token}
+        self._tokens[key] = token
+
+    def _refresh_in_background(self, key: tuple[str, ...]) -> None:
+        if not self._lock.acquire(blocking=False):
+            return  # a refresh is already running
+
+        def run() -> None:
+            try:
+                self._store(key, self._load_or_refresh(margin=PROACTIVE_REFRESH))
+            except Exception as exc:
+                get_logger().warning("Background TikTok token refresh failed: %s", exc)
+            finally:
+                self._lock.release()
+
+        threading.Thread(target=run, name="tiktok-token-refresh", daemon=True).start()
+
+    def _acquire_lease(self) -> bool:
+        now = datetime.utcnow()
+        result = get_mongo_client()[DB_NAME][COLLECTION_POSTS].update_one(
+            {
+                "type": "oauth_token",
+                "$or": [
+                    {"refresh_lease_until": {"$exists": False}},
+                    {"refresh_lease_until": {"$lt": now}},
+                ],
+            },
+            {"$set": {"refresh_lease_until": now + REFRESH_LEASE, "refresh_lease_owner": self._owner}},
+        )
+        return result.modified_count == 1
+
+    def _release_lease(self) -> None:
+        get_mongo_client()[DB_NAME][COLLECTION_POSTS].update_one(
+            {"type": "oauth_token", "refresh_lease_owner": self._owner},
+            {"$unset": {"refresh_lease_until": "", "refresh_lease_owner": ""}},
+        )
+
+    def _load_or_refresh(self, margin: timedelta = REFRESH_MARGIN) -> OAuthToken:
+        logger = get_logger()
+        deadline = time.monotonic() + REFRESH_LEASE.total_seconds()
+        while True:
+            # Another replica may already have refreshed it.
+            token = load_token()
+            if _usable(token, margin):
+                return token
+            if not token or not token.refresh_token:
+                logger.info("No valid TikTok token found. Initiate OAuth flow.")
+                raise RuntimeError("TikTok OAuth required. Use run_oauth_flow() to authorize.")
+
+            if self._acquire_lease():
+                try:
+                    logger.info("Refreshing TikTok access token")
+                    token = refresh_access_token(token.refresh_token)
+                    store_token(token)
+                    return token
+                except BaseException:
+                    self._release_lease()
+                    raise
+
+            # Someone else holds the lease. A token that still works is good enough meanwhile.
+            if _usable(token):
+                return token
+            if time.monotonic() > deadline:
+                raise RuntimeError("Timed out waiting for another process to refresh the TikTok token.")
+            time.sleep(LEASE_POLL_SECONDS)
+
+
+@lru_cache(maxsize=1)
+def get_token_cache() -> TokenCache:
+    return TokenCache()
 
-    if token and token.refresh_token:
-        logger.info("Refreshing TikTok access token")
-        token = refresh_access_token(token.refresh_token)
-        store_token(token)
-        return token
 
-    logger.info("No valid TikTok token found. Initiate OAuth flow.")
-    raise RuntimeError("TikTok OAuth required. Use run_oauth_flow() to authorize.")
+def ensure_token(scopes: list[str]) -> OAuthToken:
+    return get_token_cache().get(scopes)
 
 
 def run_oauth_flow(scopes: list[str], port: int = 8080, state: str = "state") -> OAuthToken:
@@ -194,4 +307,5 @@ def run_oauth_flow(scopes: list[str], port: int = 8080, state: str = "state") ->
 
     token = exchange_code_for_token(OAuthCallbackHandler.code)
     store_token(token)
+    get_token_cache().clear()
     return token
@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime, timedelta
+
+from pymongo import UpdateOne
+
+from src.config import COLLECTION_POSTS, DB_NAME, get_logger, get_mongo_client
+from src.http_client import aclose_http_client
+from src.poster.auth import ensure_token
+from src.poster.uploader import afetch_publish_status
+
+TERMINAL_STATUSES = frozenset({"PUBLISH_COMPLETE", "FAILED", "SEND_TO_USER_INBOX"})
+# Set locally when TikTok never reports a final state.
+STATUS_TIMED_OUT = "STATUS_TIMEOUT"
+BACKOFF_BASE = timedelta(seconds=15)
+BACKOFF_MAX = timedelta(minutes=15)
+GIVE_UP_AFTER = timedelta(hours=48)
+BATCH_SIZE = 50
+
+
+def _next_check(checks: int, now: datetime) -> datetime:
+    return now + min(BACKOFF_BASE * 2**checks, BACKOFF_MAX)
+
+
+async def _fetch_all(access_token: str, publish_ids: list[str]) -> list[dict | BaseException]:
+    try:
+        return await asyncio.gather(
+            *(afetch_publish_status(access_token, publish_id) for publish_id in publish_ids),
+            return_exceptions=True,
+        )
+    finally:
+        await aclose_http_client()
+
+
+def _update_for(post: dict, result: dict | BaseException, now: datetime) -> UpdateOne:
+    checks = post.get("status_checks", 0) + 1
+    fields: dict = {"status_checks": checks, "status_checked_at": now}
+    if isinstance(result, BaseException):
+        fields["status_error"] = repr(result)
+        status = post.get("status")
+    else:
+        status = result.get("status", "UNKNOWN")
+        fields["status"] = status
+        if result.get("fail_reason"):
+            fields["fail_reason"] = result["fail_reason"]
+        if result.get("publicaly_available_post_id"):
+            fields["post_ids"] = result["publicaly_available_post_id"]
+
+    if status in TERMINAL_STATUSES:
+        return UpdateOne({"_id": post["_id"]}, {"$set": fields, "$unset": {"next_check_at": ""}})
+    if now - post["created_at"] > GIVE_UP_AFTER:
+        fields["status"] = STATUS_TIMED_OUT
+        return UpdateOne({"_id": post["_id"]}, {"$set": fields, "$unset": {"next_check_at": ""}})
+    fields["next_check_at"] = _next_check(checks, now)
+    return UpdateOne({"_id": post["_id"]}, {"$set": fields})
+
+
+def track_publish_status() -> int:
+    """Poll every post that is due, concurrently, and store the results in one bulk write.
+
+    Posts back off exponentially between checks until TikTok reports a final
+    status. Returns the number of posts checked.
+    """
+    logger = get_logger()
+    collection = get_mongo_client()[DB_NAME][COLLECTION_POSTS]
+    now = datetime.utcnow()
+    # Only posts still being tracked carry next_check_at; it is unset at a final state.
+    posts = list(
+        collection.find(
+            {"next_check_at": {"$lte": now}},
+            {"publish_id": 1, "status": 1, "status_checks": 1, "created_at": 1},
+        )
+        .sort("next_check_at", 1)
+        .limit(BATCH_SIZE)
+    )
+    if not posts:
+        return 0
+
+    token = ensure_token(scopes=["video.publish", "user.info.basic"])
+    results = asyncio.run(_fetch_all(token.access_token, [post["publish_id"] for post in posts]))
+    now = datetime.utcnow()
+    updates = [_update_for(post, result, now) for post, result in zip(posts, results)]
+    collection.bulk_write(updates, ordered=False)
+
+    final = [
+        f"{post['publish_id']}={result['status']}"
+        for post, result in zip(posts, results)
+        if not isinstance(result, BaseException) and result.get("status") in TERMINAL_STATUSES
+    ]
+    failures = sum(isinstance(result, BaseException) for result in results)
+    logger.info(
+        "Checked %d publish statuses: %d final%s, %d errors",
+        len(posts),
+        len(final),
+        f" ({', '.join(final)})" if final else "",
+        failures,
+    )
+    return len(posts)
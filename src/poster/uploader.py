@@ -1,17 +1,30 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
-from datetime import datetime
+import mmap
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timedelta
 from pathlib import Path
+from typing import Callable, Iterator
 
-import httpx
-
-from src.config import get_config, get_logger
+from src.config import COLLECTION_UPLOAD_SESSIONS, DB_NAME, get_config, get_logger, get_mongo_client
+from src.http_client import arequest, request
 from src.poster.auth import ensure_token
+from src.run_state import file_sha256
 
 VIDEO_INIT_URL = "https://open.tiktokapis.com/v2/post/publish/video/init/"
 VIDEO_STATUS_URL = "https://open.tiktokapis.com/v2/post/publish/status/fetch/"
 
+# TikTok chunk rules: 5-64 MB per chunk, the remainder rides on the last chunk
+# (up to 128 MB), and files under 5 MB go up as a single chunk.
+MIN_CHUNK_SIZE = 5 * 1024 * 1024
+MAX_CHUNK_SIZE = 64 * 1024 * 1024
+# Each chunk body is streamed from the memory map in pieces of this size.
+STREAM_PIECE_SIZE = 1024 * 1024
+# upload_url stays valid for an hour after init; stop resuming a little before that.
+SESSION_LIFETIME = timedelta(minutes=55)
+# Recorded on posts once the file is uploaded; the status tracker takes it from there.
+STATUS_UPLOADED = "UPLOADED"
+
 
 @dataclass
 class UploadResult:
@@ -19,7 +32,79 @@ class UploadResult:
     status: str
 
 
-def init_video_upload(access_token: str, title: str, privacy: str, video_size: int) -> dict:
+@dataclass
+class UploadSession:
+    """An initialized upload, persisted so an interrupted upload resumes at its next chunk."""
+
+    video_sha256: str
+    title: str
+    publish_id: str
+    upload_url: str
+    video_size: int
+    chunk_size: int
+    total_chunk_count: int
+    next_chunk: int = 0
+    expires_at: datetime = field(default_factory=lambda: datetime.utcnow() + SESSION_LIFETIME)
+
+
+def plan_chunks(video_size: int, chunk_size: int) -> tuple[int, int]:
+    """Clamp ``chunk_size`` to TikTok's limits and return (chunk_size, total_chunk_count)."""
+    if video_size <= 0:
+        raise ValueError("Cannot upload an empty video.")
+    if video_size < MIN_CHUNK_SIZE:
+        return video_size, 1
+    chunk_size = min(max(chunk_size, MIN_CHUNK_SIZE), MAX_CHUNK_SIZE, video_size)
+    return chunk_size, video_size // chunk_size
+
+
+def _chunk_range(index: int, chunk_size: int, total_chunk_count: int, video_size: int) -> tuple[int, int]:
+    start = index * chunk_size
+    end = video_size if index == total_chunk_count - 1 else start + chunk_size
+    return start, end
+
+
+class _ChunkBody:
+    """Re-iterable view of one chunk, so a retried PUT re-reads it from the map."""
+
+    def __init__(self, view: mmap.mmap, start: int, end: int) -> None:
+        self.view = view
+        self.start = start
+        self.end = end
+
+    def __iter__(self) -> Iterator[bytes]:
+        for offset in range(self.start, self.end, STREAM_PIECE_SIZE):
+            yield self.view[offset : min(offset + STREAM_PIECE_SIZE, self.end)]
+
+
+def _sessions():
+    return get_mongo_client()[DB_NAME][COLLECTION_UPLOAD_SESSIONS]
+
+
+def _load_session(video_sha256: str, title: str) -> UploadSession | None:
+    doc = _sessions().find_one(
+        {"_id": video_sha256, "title": title, "expires_at": {"$gt": datetime.utcnow()}},
+        {"_id": 0},
+    )
+    return UploadSession(**doc) if doc else None
+
+
+def _save_session(session: UploadSession) -> None:
+    _sessions().replace_one({"_id": session.video_sha256}, asdict(session), upsert=True)
+
+
+def _record_chunk(session: UploadSession, index: int) -> None:
+    session.next_chunk = index + 1
+    _sessions().update_one({"_id": session.video_sha256}, {"$set": {"next_chunk": session.next_chunk}})
+
+
+def init_video_upload(
+    access_token: str,
+    title: str,
+    privacy: str,
+    video_size: int,
+    chunk_size: int | None = None,
+    total_chunk_count: int = 1,
+) -> dict:
     payload = {
         "post_info": {
             "title": title,
@@ -31,11 +116,13 @@ def init_video_upload(access_token: str, title: str, privacy: str, video_size: i
         "source_info": {
             "source": "FILE_UPLOAD",
             "video_size": video_size,
+            "chunk_size": chunk_size or video_size,
+            "total_chunk_count": total_chunk_count,
         },
     }
 
     headers = {"Authorization": f"Bearer {access_token}", "Content-Type": "application/json"}
-    response = httpx.post(VIDEO_INIT_URL, json=payload, headers=headers, timeout=60)
+    response = request("POST", VIDEO_INIT_URL, json=payload, headers=headers, timeout=60)
     response.raise_for_status()
     data = response.json()
     if "data" not in data:
@@ -43,46 +130,147 @@ def init_video_upload(access_token: str, title: str, privacy: str, video_size: i
     return data["data"]
 
 
-def upload_video_file(upload_url: str, video_path: Path) -> None:
-    with video_path.open("rb") as handle:
-        response = httpx.put(upload_url, content=handle.read(), timeout=300)
-        response.raise_for_status()
+def upload_video_file(
+    upload_url: str,
+    video_path: Path,
+    chunk_size: int | None = None,
+    total_chunk_count: int = 1,
+    start_chunk: int = 0,
+    on_chunk: Callable[[int], None] | None = None,
+) -> None:
+    """PUT the file chunk by chunk with Content-Range headers, streaming from a memory map.
+
+    Each chunk is retried on its own, so a dropped connection costs one chunk;
+    ``on_chunk`` is called with the index of every chunk the server accepted.
+    """
+    logger = get_logger()
+    config = get_config()
+    video_size = video_path.stat().st_size
+    chunk_size = chunk_size or video_size
+    with video_path.open("rb") as handle, mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as view:
+        for index in range(start_chunk, total_chunk_count):
+            start, end = _chunk_range(index, chunk_size, total_chunk_count, video_size)
+            headers = {
+                "Content-Type": "video/mp4",
+                "Content-Length": str(end - start),
+                "Content-Range": f"bytes {start}-{end - 1}/{video_size}",
+            }
+            response = request(
+                "PUT",
+                upload_url,
+                content=_ChunkBody(view, start, end),
+                headers=headers,
+                timeout=120,
+                max_attempts=config.upload_chunk_attempts,
+            )
+            response.raise_for_status()
+            logger.debug("Uploaded chunk %d/%d (%s)", index + 1, total_chunk_count, headers["Content-Range"])
+            if on_chunk is not None:
+                on_chunk(index)
+
+
+def _status_data(response) -> dict:
+    response.raise_for_status()
+    payload = response.json()
+    if "data" not in payload:
+        raise RuntimeError(f"Status fetch error: {payload}")
+    return payload["data"]
 
 
 def fetch_publish_status(access_token: str, publish_id: str) -> str:
     headers = {"Authorization": f"Bearer {access_token}", "Content-Type": "application/json"}
-    response = httpx.post(
+    response = request(
+        "POST",
         VIDEO_STATUS_URL,
         json={"publish_id": publish_id},
         headers=headers,
         timeout=30,
+        # A status lookup changes nothing, so it retries like a GET.
+        idempotent=True,
     )
-    response.raise_for_status()
-    payload = response.json()
-    if "data" not in payload:
-        raise RuntimeError(f"Status fetch error: {payload}")
-    return payload["data"].get("status", "UNKNOWN")
+    return _status_data(response).get("status", "UNKNOWN")
+
+
+async def afetch_publish_status(access_token: str, publish_id: str) -> dict:
+    """Full status payload (status, fail_reason, ...) for one publish_id."""
+    headers = {"Authorization": f"Bearer {access_token}", "Content-Type": "application/json"}
+    response = await arequest(
+        "POST",
+        VIDEO_STATUS_URL,
+        json={"publish_id": publish_id},
+        headers=headers,
+        timeout=30,
+        idempotent=True,
+    )
+    return _status_data(response)
+
 
+def _check_keep_going(keep_going: Callable[[], bool] | None, video_path: Path) -> None:
+    if keep_going is not None and not keep_going():
+        raise RuntimeError(f"Upload of {video_path} stopped; it may be resumed from its session")
 
-def post_video(video_path: Path, title: str) -> UploadResult:
+
+def post_video(
+    video_path: Path,
+    title: str,
+    keep_going: Callable[[], bool] | None = None,
+) -> UploadResult:
+    """Upload a video in chunks, resuming a stored session for the same file and title.
+
+    ``keep_going`` is checked before the upload starts and after every chunk;
+    once it returns False the upload stops and the session is kept for a resume.
+    """
     config = get_config()
     logger = get_logger()
 
-    token = ensure_token(scopes=["video.publish", "user.info.basic"])
-    init_data = init_video_upload(
-        token.access_token,
-        title=title,
-        privacy=config.post_privacy,
-        video_size=video_path.stat().st_size,
-    )
+    _check_keep_going(keep_going, video_path)
 
-    upload_url = init_data.get("upload_url")
-    publish_id = init_data.get("publish_id")
-    if not upload_url or not publish_id:
-        raise RuntimeError(f"Missing upload_url or publish_id: {init_data}")
+    token = ensure_token(scopes=["video.publish", "user.info.basic"])
+    video_sha256 = file_sha256(video_path)
+    session = _load_session(video_sha256, title)
+    if session is not None:
+        logger.info(
+            "Resuming upload %s at chunk %d/%d",
+            session.publish_id,
+            session.next_chunk + 1,
+            session.total_chunk_count,
+        )
+    else:
+        video_size = video_path.stat().st_size
+        chunk_size, total_chunk_count = plan_chunks(video_size, config.upload_chunk_mb * 1024 * 1024)
+        init_data = init_video_upload(
+            token.access_token,
+            title=title,
+            privacy=config.post_privacy,
+            video_size=video_size,
+            chunk_size=chunk_size,
+            total_chunk_count=total_chunk_count,
+        )
 
-    upload_video_file(upload_url, video_path)
-    status = fetch_publish_status(token.access_token, publish_id)
-    logger.info("TikTok publish status: %s", status)
+        upload_url = init_data.get("upload_url")
+        publish_id = init_data.get("publish_id")
+        if not upload_url or not publish_id:
+            raise RuntimeError(f"Missing upload_url or publish_id: {init_data}")
+        session = UploadSession(
+            video_sha256=video_sha256,
+            title=title,
+            publish_id=publish_id,
+            upload_url=upload_url,
+            video_size=video_size,
+            chunk_size=chunk_size,
+            total_chunk_count=total_chunk_count,
+        )
+        _save_session(session)
 
-    return UploadResult(publish_id=publish_id, status=status)
+    upload_video_file(
+        session.upload_url,
+        video_path,
+        chunk_size=session.chunk_size,
+        total_chunk_count=session.total_chunk_count,
+        start_chunk=session.next_chunk,
+        on_chunk=lambda index: (_record_chunk(session, index), _check_keep_going(keep_going, video_path)),
+    )
+    _sessions().delete_one({"_id": video_sha256})
+    # TikTok processes the video after upload; the status tracker follows it to a final state.
+    logger.info("TikTok upload complete: %s", session.publish_id)
+    return UploadResult(publish_id=session.publish_id, status=STATUS_UPLOADED)
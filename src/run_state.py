@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+import hashlib
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+from pymongo import ReturnDocument
+
+from src.config import COLLECTION_RUN_STATES, DB_NAME, get_logger, get_mongo_client
+
+STATUS_RUNNING = "running"
+STATUS_FAILED = "failed"
+STATUS_DONE = "done"
+
+
+def file_sha256(path: Path, chunk_size: int = 1024 * 1024) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as handle:
+        while chunk := handle.read(chunk_size):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _artifact(path: Path) -> dict:
+    return {"path": str(path), "size": path.stat().st_size, "sha256": file_sha256(path)}
+
+
+def _artifact_valid(artifact: dict) -> bool:
+    path = Path(artifact["path"])
+    # Size first: a truncated or replaced file fails without hashing it.
+    if not path.is_file() or path.stat().st_size != artifact["size"]:
+        return False
+    return file_sha256(path) == artifact["sha256"]
+
+
+def _collection():
+    return get_mongo_client()[DB_NAME][COLLECTION_RUN_STATES]
+
+
+class RunState:
+    """Checkpoints for one topic's trip through the pipeline, stored in ``run_states``.
+
+    Each completed stage records its outputs, the key of the inputs it was built
+    from, and the size and sha256 of any files it wrote. A stage is only reused
+    while its input key matches and every artifact still hashes the same, so a
+    rerun picks up at the first stage that is missing, stale or damaged.
+    """
+
+    def __init__(self, doc: dict) -> None:
+        self.doc = doc
+
+    @property
+    def key(self) -> str:
+        return self.doc["_id"]
+
+    @classmethod
+    def start(cls, key: str, trend: dict) -> RunState:
+        now = datetime.utcnow()
+        # Only what a resumed run needs; raw signal payloads may not be BSON-encodable.
+        summary = {"topic": trend["topic"], "source": trend.get("source"), "score": float(trend.get("score", 0))}
+        doc = _collection().find_one_and_update(
+            {"_id": key},
+            {
+                "$setOnInsert": {"topic": trend["topic"], "trend": summary, "stages": {}, "created_at": now},
+                "$set": {"status": STATUS_RUNNING, "updated_at": now},
+                "$inc": {"attempts": 1},
+            },
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        return cls(doc)
+
+    @classmethod
+    def load(cls, key: str) -> RunState:
+        """The checkpoints of a run started elsewhere, e.g. by another replica."""
+        doc = _collection().find_one({"_id": key})
+        if doc is None:
+            raise LookupError(f"No run state for {key}")
+        return cls(doc)
+
+    def completed(self, stage: str, input_key: str | None = None) -> dict | None:
+        """The stored record for ``stage`` if it can be reused as is, else None."""
+        record = self.doc.get("stages", {}).get(stage)
+        if record is None or record.get("input_key") != input_key:
+            return None
+        artifacts = record.get("artifacts", {})
+        if not all(_artifact_valid(artifact) for artifact in artifacts.values()):
+            get_logger().warning("Checkpoint %s for %s has invalid artifacts; redoing it", stage, self.key)
+            return None
+        return record
+
+    def complete(
+        self,
+        stage: str,
+        input_key: str | None = None,
+        artifacts: dict[str, Path] | None = None,
+        **data: Any,
+    ) -> dict:
+        record = {
+            "input_key": input_key,
+            "artifacts": {name: _artifact(path) for name, path in (artifacts or {}).items()},
+            "completed_at": datetime.utcnow(),
+            **data,
+        }
+        self.doc.setdefault("stages", {})[stage] = record
+        _collection().update_one(
+            {"_id": self.key},
+            {"$set": {f"stages.{stage}": record, "updated_at": record["completed_at"]}},
+        )
+        return record
+
+    def fail(self, error: BaseException) -> None:
+        _collection().update_one(
+            {"_id": self.key},
+            {"$set": {"status": STATUS_FAILED, "last_error": repr(error), "updated_at": datetime.utcnow()}},
+        )
+
+    def finish(self) -> None:
+        _collection().update_one(
+            {"_id": self.key},
+            {"$set": {"status": STATUS_DONE, "updated_at": datetime.utcnow()}, "$unset": {"last_error": ""}},
+        )
+
+
+def resumable_runs(limit: int, max_attempts: int, exclude: set[str] | None = None) -> list[dict]:
+    """Failed or interrupted runs worth another attempt, oldest first."""
+    if limit <= 0:
+        return []
+    query = {
+        "status": {"$in": [STATUS_FAILED, STATUS_RUNNING]},
+        "attempts": {"$lt": max_attempts},
+    }
+    if exclude:
+        query["_id"] = {"$nin": list(exclude)}
+    return list(_collection().find(query, {"trend": 1}).sort("updated_at", 1).limit(limit))
+
+
+def exhausted_runs(keys: list[str], max_attempts: int) -> set[str]:
+    """Topics among ``keys`` whose unfinished runs have used up their attempts."""
+    query = {"_id": {"$in": keys}, "status": {"$ne": STATUS_DONE}, "attempts": {"$gte": max_attempts}}
+    return {doc["_id"] for doc in _collection().find(query, {"_id": 1})}
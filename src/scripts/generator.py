@@ -1,21 +1,32 @@
 from __future__ import annotations
 
 import json
+from dataclasses import dataclass
 from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterator
 
-import httpx
 import os
 
+from src.cache import DiskCache, cache_key
 from src.config import get_config, get_logger
+from src.http_client import request, stream
+from src.scripts.sentences import SentenceSplitter, split_sentences
 
 SYSTEM_PROMPT = (
     "You are a TikTok scriptwriter specializing in AI and personal finance. "
     "Create viral 30-60 second scripts with strong hooks, pattern interrupts, "
     "clear value delivery, and a concise CTA."
 )
+MAX_TOKENS = 800
+TEMPERATURE = 0.7
+
+_JSON_ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
 
 
 def build_prompt(topic: str) -> str:
+    # narration comes first so streaming mode can start voiceover as early as possible.
     return (
         "Write a 30-60 second TikTok script about the topic below. "
         "Use a pattern-interrupt hook in the first 2 seconds. "
@@ -23,61 +34,277 @@ def build_prompt(topic: str) -> str:
         "End with a short CTA. Provide suggested hashtags. "
         "Also provide a full narration string for TTS.\n\n"
         f"Topic: {topic}\n\n"
-        "Return ONLY valid JSON with keys: "
-        "hook (string), body_points (array of strings), cta (string), "
-        "hashtags (array of strings without #), narration (string)."
+        "Return ONLY valid JSON with keys in this order: "
+        "narration (string), hook (string), body_points (array of strings), cta (string), "
+        "hashtags (array of strings without #)."
     )
 
 
-def generate_script(topic: str) -> dict:
+@lru_cache(maxsize=1)
+def get_script_cache() -> DiskCache:
+    config = get_config()
+    return DiskCache(
+        Path(config.llm_cache_dir),
+        max_bytes=config.llm_cache_max_mb * 1024 * 1024,
+        max_age=config.llm_cache_max_age_hours * 3600,
+        suffix=".json",
+    )
+
+
+@dataclass(frozen=True)
+class _LLMRequest:
+    url: str
+    headers: dict
+    payload: dict
+    cache_key: str
+
+
+def _build_request(topic: str) -> _LLMRequest:
     config = get_config()
-    logger = get_logger()
 
     # Support both direct Anthropic key and OpenAI-compatible endpoints
     api_key = config.anthropic_api_key or os.getenv("OPENAI_API_KEY", "")
     base_url = os.getenv("LLM_BASE_URL", "https://api.anthropic.com")
     model = os.getenv("LLM_MODEL", "claude-sonnet-4-20250514")
 
-    if not api_key:
-        raise ValueError("ANTHROPIC_API_KEY or OPENAI_API_KEY missing.")
-
     prompt = build_prompt(topic)
+    headers = {
+        "x-api-key": api_key,
+        "anthropic-version": "2023-06-01",
+        "content-type": "application/json",
+    }
+    payload = {
+        "model": model,
+        "max_tokens": MAX_TOKENS,
+        "temperature": TEMPERATURE,
+        "system": SYSTEM_PROMPT,
+        "messages": [{"role": "user", "content": prompt}],
+    }
+    return _LLMRequest(
+        url=f"{base_url}/v1/messages",
+        headers=headers,
+        payload=payload,
+        cache_key=cache_key(model, SYSTEM_PROMPT, prompt, TEMPERATURE, MAX_TOKENS),
+    )
+
+
+def _cached_script(key: str, topic: str) -> dict | None:
+    cached = get_script_cache().get(key)
+    if cached is None:
+        return None
+    get_logger().info("LLM cache hit for topic: %s", topic)
+    data = json.loads(cached)
+    data["topic"] = topic
+    return data
+
+
+def _parse_script(content: str) -> dict:
+    # Strip markdown code fences if present
+    if content.startswith("```"):
+        content = content.split("\n", 1)[1] if "\n" in content else content
+        if content.endswith("```"):
+            content = content[:-3]
+    return json.loads(content.strip())
+
+
+def _finish_script(content: str, topic: str, key: str, use_cache: bool) -> dict:
+    data = _parse_script(content)
+    data["topic"] = topic
+    data["generated_at"] = datetime.utcnow().isoformat()
+    if use_cache:
+        get_script_cache().set(key, json.dumps(data).encode("utf-8"))
+    return data
+
+
+def generate_script(topic: str, use_cache: bool = True) -> dict:
+    config = get_config()
+    logger = get_logger()
+
+    llm = _build_request(topic)
+    use_cache = use_cache and config.llm_cache_enabled
+    if use_cache:
+        cached = _cached_script(llm.cache_key, topic)
+        if cached is not None:
+            return cached
 
+    if not llm.headers["x-api-key"]:
+        raise ValueError("ANTHROPIC_API_KEY or OPENAI_API_KEY missing.")
+
+    content = ""
     try:
         # Use Anthropic Messages API directly
-        headers = {
-            "x-api-key": api_key,
-            "anthropic-version": "2023-06-01",
-            "content-type": "application/json",
-        }
-        payload = {
-            "model": model,
-            "max_tokens": 800,
-            "temperature": 0.7,
-            "system": SYSTEM_PROMPT,
-            "messages": [{"role": "user", "content": prompt}],
-        }
-        response = httpx.post(
-            f"{base_url}/v1/messages",
-            json=payload,
-            headers=headers,
+        response = request(
+            "POST",
+            llm.url,
+            json=llm.payload,
+            headers=llm.headers,
             timeout=60,
+            # A repeated completion only costs tokens, so retry it like a GET.
+            idempotent=True,
         )
         response.raise_for_status()
         result = response.json()
         content = result["content"][0]["text"] if result.get("content") else ""
-        # Strip markdown code fences if present
-        if content.startswith("```"):
-            content = content.split("\n", 1)[1] if "\n" in content else content
-            if content.endswith("```"):
-                content = content[:-3]
-        data = json.loads(content.strip())
-        data["topic"] = topic
-        data["generated_at"] = datetime.utcnow().isoformat()
-        return data
+        return _finish_script(content, topic, llm.cache_key, use_cache)
     except json.JSONDecodeError as exc:
         logger.exception("LLM JSON parse error: %s\nRaw: %s", exc, content)
         raise
     except Exception as exc:
         logger.exception("LLM generation failed: %s", exc)
         raise
+
+
+class JSONFieldStreamer:
+    """Incrementally decode one top-level string field from a JSON document as it streams in.
+
+    ``feed`` returns the newly decoded characters of the field's value; anything
+    before the opening brace (e.g. a markdown code fence) is ignored.
+    """
+
+    def __init__(self, field: str) -> None:
+        self.field = field
+        self.done = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._unicode: str | None = None
+        self._high_surrogate: int | None = None
+        self._expect_value = False
+        self._is_key = False
+        self._is_target = False
+        self._key = ""
+        self._last_key = ""
+
+    def _emit(self, char: str, out: list[str]) -> None:
+        if self._is_key:
+            self._key += char
+        elif self._is_target:
+            out.append(char)
+
+    def _emit_codepoint(self, codepoint: int, out: list[str]) -> None:
+        if 0xD800 <= codepoint < 0xDC00:
+            self._high_surrogate = codepoint
+            return
+        if 0xDC00 <= codepoint < 0xE000 and self._high_surrogate is not None:
+            codepoint = 0x10000 + ((self._high_surrogate - 0xD800) << 10) + (codepoint - 0xDC00)
+        self._high_surrogate = None
+        self._emit(chr(codepoint), out)
+
+    def feed(self, text: str) -> str:
+        out: list[str] = []
+        for char in text:
+            if self._in_string:
+                if self._unicode is not None:
+                    self._unicode += char
+                    if len(self._unicode) == 4:
+                        self._emit_codepoint(int(self._unicode, 16), out)
+                        self._unicode = None
+                elif self._escape:
+                    self._escape = False
+                    if char == "u":
+                        self._unicode = ""
+                    else:
+                        self._emit(_JSON_ESCAPES.get(char, char), out)
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    if self._is_key:
+                        self._last_key = self._key
+                    if self._is_target:
+                        self.done = True
+                else:
+                    self._emit(char, out)
+            elif char == '"' and self._depth >= 1:
+                self._in_string = True
+                self._is_key = self._depth == 1 and not self._expect_value
+                self._is_target = (
+                    self._depth == 1 and self._expect_value and self._last_key == self.field
+                )
+                self._key = ""
+            elif char in "{[":
+                self._depth += 1
+            elif char in "}]":
+                self._depth -= 1
+            elif char == ":" and self._depth == 1:
+                self._expect_value = True
+            elif char == "," and self._depth == 1:
+                self._expect_value = False
+        return "".join(out)
+
+
+class ScriptStream:
+    """Stream a script from the Messages API, yielding narration sentences as they complete.
+
+    Iterate to receive sentences; once iteration finishes, ``script`` holds the
+    fully parsed script exactly as ``generate_script`` would return it.
+    """
+
+    def __init__(self, topic: str, use_cache: bool = True) -> None:
+        self.topic = topic
+        self.use_cache = use_cache and get_config().llm_cache_enabled
+        self.script: dict | None = None
+
+    def _text_deltas(self, llm: _LLMRequest) -> Iterator[str]:
+        with stream(
+            "POST",
+            llm.url,
+            json={**llm.payload, "stream": True},
+            headers=llm.headers,
+            timeout=60,
+            idempotent=True,
+        ) as response:
+            response.raise_for_status()
+            for line in response.iter_lines():
+                if not line.startswith("data:"):
+                    continue
+                event = json.loads(line[len("data:") :].strip())
+                if event.get("type") == "error":
+                    raise RuntimeError(f"LLM stream error: {event.get('error')}")
+                delta = event.get("delta", {})
+                if event.get("type") == "content_block_delta" and delta.get("type") == "text_delta":
+                    yield delta["text"]
+
+    def __iter__(self) -> Iterator[str]:
+        logger = get_logger()
+        llm = _build_request(self.topic)
+        if self.use_cache:
+            cached = _cached_script(llm.cache_key, self.topic)
+            if cached is not None:
+                self.script = cached
+                yield from split_sentences(cached.get("narration", ""))
+                return
+
+        if not llm.headers["x-api-key"]:
+            raise ValueError("ANTHROPIC_API_KEY or OPENAI_API_KEY missing.")
+
+        streamer = JSONFieldStreamer("narration")
+        splitter = SentenceSplitter()
+        chunks: list[str] = []
+        yielded = False
+        try:
+            for text in self._text_deltas(llm):
+                chunks.append(text)
+                narration = streamer.feed(text)
+                for sentence in splitter.feed(narration):
+                    yielded = True
+                    yield sentence
+                if streamer.done:
+                    for sentence in splitter.flush():
+                        yielded = True
+                        yield sentence
+            self.script = _finish_script("".join(chunks), self.topic, llm.cache_key, self.use_cache)
+        except json.JSONDecodeError as exc:
+            logger.exception("LLM JSON parse error: %s\nRaw: %s", exc, "".join(chunks))
+            raise
+        except Exception as exc:
+            logger.exception("LLM streaming generation failed: %s", exc)
+            raise
+
+        if not yielded:
+            # The model nested or omitted narration; fall back to the parsed script.
+            yield from split_sentences(self.script.get("narration", ""))
+
+
+def stream_script(topic: str, use_cache: bool = True) -> ScriptStream:
+    return ScriptStream(topic, use_cache=use_cache)
@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+import re
+
+# A sentence ends at . ! or ? (optionally followed by closing quotes/brackets) plus whitespace.
+_BOUNDARY = re.compile(r"(?<=[.!?])[\"')\]]*\s+")
+
+
+class SentenceSplitter:
+    """Incremental splitter: feed text as it arrives, get back sentences once they are complete."""
+
+    def __init__(self) -> None:
+        self._buffer = ""
+
+    def feed(self, text: str) -> list[str]:
+        self._buffer += text
+        sentences: list[str] = []
+        start = 0
+        for match in _BOUNDARY.finditer(self._buffer):
+            sentence = self._buffer[start : match.start()].strip()
+            closing = match.group(0).strip()
+            if sentence:
+                sentences.append(sentence + closing)
+            start = match.end()
+        self._buffer = self._buffer[start:]
+        return sentences
+
+    def flush(self) -> list[str]:
+        remainder, self._buffer = self._buffer.strip(), ""
+        return [remainder] if remainder else []
+
+
+def split_sentences(text: str) -> list[str]:
+    splitter = SentenceSplitter()
+    return splitter.feed(text) + splitter.flush()
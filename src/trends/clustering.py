@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import hashlib
+import re
+from collections import defaultdict
+from typing import Iterable
+
+import numpy as np
+
+from src.trends.scorer import TrendSignal
+
+SHINGLE_SIZE = 4
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+# Estimated Jaccard similarity above which two signals are the same topic.
+THRESHOLD = 0.5
+# Score boost per additional distinct source agreeing on a topic.
+SOURCE_BOOST = 0.25
+# Topics this short (a Google keyword, say) also join any longer topic containing them
+# as a phrase; their shingles are too few for Jaccard similarity to reach THRESHOLD.
+# Single words are left out: "ai" or "crypto" would pull in every title.
+PHRASE_WORDS = (2, 3)
+
+_PRIME = (1 << 31) - 1
+_rng = np.random.default_rng(0x5EED)
+_A = _rng.integers(1, _PRIME, size=NUM_PERM, dtype=np.uint64)
+_B = _rng.integers(0, _PRIME, size=NUM_PERM, dtype=np.uint64)
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+
+
+def _shingles(text: str) -> set[str]:
+    normalized = _NON_WORD.sub(" ", text.lower()).strip()
+    if len(normalized) <= SHINGLE_SIZE:
+        return {normalized}
+    return {normalized[i : i + SHINGLE_SIZE] for i in range(len(normalized) - SHINGLE_SIZE + 1)}
+
+
+def minhash(text: str) -> np.ndarray:
+    hashes = np.fromiter(
+        (
+            int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=4).digest(), "little")
+            for shingle in _shingles(text)
+        ),
+        dtype=np.uint64,
+    )
+    # (a * x + b) mod p stays below 2**63 because a < 2**31 and x < 2**32.
+    return ((np.outer(hashes, _A) + _B) % _PRIME).min(axis=0)
+
+
+def _find(parents: list[int], i: int) -> int:
+    while parents[i] != i:
+        parents[i] = parents[parents[i]]
+        i = parents[i]
+    return i
+
+
+def _words(text: str) -> list[str]:
+    return _NON_WORD.sub(" ", text.lower()).split()
+
+
+def _link_phrases(signals: list[TrendSignal], parents: list[int]) -> None:
+    """Join each topic to the longest short topic it contains as a whole-word phrase."""
+    words = [_words(signal.topic) for signal in signals]
+    by_first_word: dict[str, list[int]] = defaultdict(list)
+    for index, topic_words in enumerate(words):
+        if PHRASE_WORDS[0] <= len(topic_words) <= PHRASE_WORDS[1]:
+            by_first_word[topic_words[0]].append(index)
+    if not by_first_word:
+        return
+    for index, topic_words in enumerate(words):
+        text = f" {' '.join(topic_words)} "
+        best = None
+        for word in set(topic_words) & by_first_word.keys():
+            for phrase in by_first_word[word]:
+                if len(words[phrase]) >= len(topic_words) or f" {' '.join(words[phrase])} " not in text:
+                    continue
+                if best is None or len(words[phrase]) > len(words[best]):
+                    best = phrase
+        # One phrase per topic, so a long title cannot chain two short topics together.
+        if best is not None:
+            root_a, root_b = _find(parents, index), _find(parents, best)
+            if root_a != root_b:
+                parents[root_a] = root_b
+
+
+def _merge(members: list[TrendSignal]) -> TrendSignal:
+    members = sorted(members, key=lambda s: s.score, reverse=True)
+    representative = members[0]
+    if len(members) == 1:
+        return representative
+    sources = sorted({member.source for member in members})
+    score = representative.score
+    # Agreement strengthens a rising topic; it must not push a falling one further down.
+    if score > 0:
+        score *= 1 + SOURCE_BOOST * (len(sources) - 1)
+    return TrendSignal(
+        topic=representative.topic,
+        source=representative.source,
+        score=score,
+        raw={
+            **representative.raw,
+            "sources": sources,
+            "members": [
+                {"topic": member.topic, "source": member.source, "score": member.score}
+                for member in members
+            ],
+        },
+        detected_at=max(member.detected_at for member in members),
+    )
+
+
+def cluster_signals(signals: Iterable[TrendSignal]) -> list[TrendSignal]:
+    """Merge near-duplicate signals across sources into one signal per topic.
+
+    Topics are compared by MinHash over character shingles; an LSH banding index
+    keeps candidate generation linear in the number of signals. Shingle Jaccard
+    rarely matches a two or three word keyword against a full post title, so
+    those short topics also join titles that contain them as a phrase. The
+    merged signal takes the strongest member's topic and lists every member in
+    ``raw["members"]``.
+    """
+    signals = list(signals)
+    if len(signals) < 2:
+        return signals
+
+    signatures = np.vstack([minhash(signal.topic) for signal in signals])
+    parents = list(range(len(signals)))
+    buckets: dict[tuple[int, bytes], list[int]] = defaultdict(list)
+    for index, signature in enumerate(signatures):
+        for band in range(BANDS):
+            key = (band, signature[band * ROWS : (band + 1) * ROWS].tobytes())
+            for other in buckets[key]:
+                root_a, root_b = _find(parents, index), _find(parents, other)
+                if root_a == root_b:
+                    continue
+                if np.mean(signatures[index] == signatures[other]) >= THRESHOLD:
+                    parents[root_a] = root_b
+            buckets[key].append(index)
+    _link_phrases(signals, parents)
+
+    clusters: dict[int, list[TrendSignal]] = defaultdict(list)
+    for index, signal in enumerate(signals):
+        clusters[_find(parents, index)].append(signal)
+    return [_merge(members) for members in clusters.values()]
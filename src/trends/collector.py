@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Callable, Iterable
+
+from src.config import get_config, get_logger
+from src.trends.scorer import TrendSignal
+
+FetchTask = Callable[[], list[TrendSignal]]
+
+
+@dataclass(frozen=True)
+class TrendSource:
+    """A trend source split into independent fetch tasks (one per keyword, subreddit, ...).
+
+    ``budget`` estimates the seconds a rate-limited source needs for a number of
+    tasks; the timeout is raised to match so long keyword lists are not cut off.
+    """
+
+    name: str
+    tasks: Callable[[], list[FetchTask]]
+    max_workers: int = 4
+    timeout: float = 60.0
+    budget: Callable[[int], float] | None = None
+
+
+def default_sources() -> list[TrendSource]:
+    from src.trends.google_trends import fetch_seconds, google_trend_tasks
+    from src.trends.reddit_trends import reddit_trend_tasks
+    from src.trends.tiktok_trends import tiktok_trend_tasks
+
+    config = get_config()
+    return [
+        TrendSource(
+            "google_trends",
+            google_trend_tasks,
+            max_workers=config.trend_fetch_workers,
+            timeout=config.trend_fetch_timeout,
+            budget=fetch_seconds,
+        ),
+        TrendSource(
+            "reddit",
+            reddit_trend_tasks,
+            max_workers=config.trend_fetch_workers,
+            timeout=config.trend_fetch_timeout,
+        ),
+        TrendSource("tiktok", tiktok_trend_tasks, max_workers=1, timeout=config.trend_fetch_timeout),
+    ]
+
+
+def collect_signals(sources: Iterable[TrendSource] | None = None) -> list[TrendSignal]:
+    """Run every source's fetch tasks concurrently and gather whatever finishes in time.
+
+    Each source gets its own bounded pool, so a slow or rate-limited source cannot
+    starve the others. Tasks still running when their source's timeout expires are
+    abandoned and the results gathered so far are kept.
+    """
+    logger = get_logger()
+    sources = list(sources if sources is not None else default_sources())
+    started = time.monotonic()
+
+    running: list[tuple[TrendSource, float, ThreadPoolExecutor, list[Future]]] = []
+    for source in sources:
+        try:
+            tasks = source.tasks()
+        except Exception as exc:
+            logger.exception("Trend source %s failed to start: %s", source.name, exc)
+            continue
+        if not tasks:
+            continue
+        timeout = source.timeout
+        if source.budget is not None:
+            needed = source.budget(len(tasks))
+            if needed > timeout:
+                logger.info(
+                    "Trend source %s needs about %.0fs for %d tasks; extending its %.0fs timeout",
+                    source.name,
+                    needed,
+                    len(tasks),
+                    timeout,
+                )
+                timeout = needed
+        executor = ThreadPoolExecutor(
+            max_workers=max(1, min(source.max_workers, len(tasks))),
+            thread_name_prefix=f"trends-{source.name}",
+        )
+        running.append((source, timeout, executor, [executor.submit(task) for task in tasks]))
+
+    signals: list[TrendSignal] = []
+    for source, timeout, executor, futures in running:
+        remaining = max(0.0, started + timeout - time.monotonic())
+        done, pending = wait(futures, timeout=remaining)
+        for future in done:
+            try:
+                signals.extend(future.result())
+            except Exception as exc:
+                logger.exception("Trend source %s task failed: %s", source.name, exc)
+        if pending:
+            logger.warning(
+                "Trend source %s timed out after %.0fs; %d of %d tasks dropped",
+                source.name,
+                timeout,
+                len(pending),
+                len(futures),
+            )
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    logger.info(
+        "Collected %d signals from %d sources in %.1fs",
+        len(signals),
+        len(running),
+        time.monotonic() - started,
+    )
+    return signals
@@ -1,12 +1,16 @@
 from __future__ import annotations
 
 from datetime import datetime, timedelta
-from typing import Iterable
+from functools import lru_cache, partial
+from typing import Callable, Iterable
 
+from pytrends.exceptions import TooManyRequestsError
 from pytrends.request import TrendReq
+from tenacity import retry, retry_if_exception, stop_after_attempt, wait_exponential_jitter
 
-from src.config import get_logger
-from src.trends.scorer import TrendSignal, velocity_score
+from src.config import get_config, get_logger
+from src.trends.ratelimit import TokenBucket
+from src.trends.scorer import FEATURE_DTYPE, TrendSignal, batch_velocity_features
 
 DEFAULT_KEYWORDS = [
     "AI tools",
@@ -16,33 +20,124 @@ DEFAULT_KEYWORDS = [
     "investing",
 ]
 
+# pytrends accepts at most five terms per payload; one slot is reserved for the anchor.
+MAX_KEYWORDS_PER_PAYLOAD = 5
+# build_payload fetches a widget token and interest_over_time fetches the data.
+REQUESTS_PER_BATCH = 2
+# Rough time for one payload's requests once the rate limiter lets them through.
+BATCH_LATENCY_SECONDS = 5.0
 
-def fetch_google_trends(keywords: Iterable[str] | None = None) -> list[TrendSignal]:
-    logger = get_logger()
-    keywords = list(keywords or DEFAULT_KEYWORDS)
-    pytrends = TrendReq(hl="en-US", tz=360)
+
+@lru_cache(maxsize=1)
+def _rate_limiter() -> TokenBucket:
+    config = get_config()
+    return TokenBucket(rate=config.google_trends_rps, capacity=config.google_trends_burst)
+
+
+def fetch_seconds(batch_count: int) -> float:
+    """How long ``batch_count`` payloads take under GOOGLE_TRENDS_RPS/BURST."""
+    config = get_config()
+    throttled = max(0, batch_count * REQUESTS_PER_BATCH - config.google_trends_burst)
+    return throttled / config.google_trends_rps + BATCH_LATENCY_SECONDS
+
+
+def _is_rate_limited(exc: BaseException) -> bool:
+    if isinstance(exc, TooManyRequestsError):
+        return True
+    response = getattr(exc, "response", None)
+    return getattr(response, "status_code", None) == 429
+
+
+def _timeframe() -> str:
     end_time = datetime.utcnow()
     start_time = end_time - timedelta(days=7)
-    timeframe = f"{start_time:%Y-%m-%d} {end_time:%Y-%m-%d}"
-
-    signals: list[TrendSignal] = []
-    for keyword in keywords:
-        try:
-            pytrends.build_payload([keyword], timeframe=timeframe, geo="US")
-            data = pytrends.interest_over_time()
-            if data.empty or keyword not in data:
-                continue
-            score = velocity_score(data[keyword].tolist())
-            signals.append(
-                TrendSignal(
-                    topic=keyword,
-                    source="google_trends",
-                    score=score,
-                    raw={"series": data[keyword].tolist(), "timeframe": timeframe},
-                    detected_at=datetime.utcnow(),
-                )
-            )
-        except Exception as exc:
-            logger.exception("Google Trends fetch failed for %s: %s", keyword, exc)
-
-    return signals
+    return f"{start_time:%Y-%m-%d} {end_time:%Y-%m-%d}"
+
+
+def _batches(keywords: list[str], anchor: str) -> list[list[str]]:
+    others = [keyword for keyword in keywords if keyword != anchor]
+    size = MAX_KEYWORDS_PER_PAYLOAD - 1
+    batches = [[anchor, *others[i : i + size]] for i in range(0, len(others), size)]
+    return batches or [[anchor]]
+
+
+@retry(
+    retry=retry_if_exception(_is_rate_limited),
+    wait=wait_exponential_jitter(initial=2, max=60),
+    stop=stop_after_attempt(5),
+    reraise=True,
+)
+def _interest_over_time(batch: list[str], timeframe: str):
+    _rate_limiter().acquire(REQUESTS_PER_BATCH)
+    # TrendReq keeps per-payload state, so each concurrent task needs its own session.
+    pytrends = TrendReq(hl="en-US", tz=360, timeout=(5, 25))
+    pytrends.build_payload(batch, timeframe=timeframe, geo="US")
+    return pytrends.interest_over_time()
+
+
+def _fetch_batch(batch: list[str], timeframe: str, include_anchor: bool) -> list[TrendSignal]:
+    """Fetch one multi-keyword payload and rescale it against the anchor keyword.
+
+    Google normalises every payload to its own peak, so series from different
+    batches are only comparable through the shared anchor: each batch is scaled
+    so the anchor's peak is 100.
+    """
+    logger = get_logger()
+    anchor = batch[0]
+    try:
+        data = _interest_over_time(batch, timeframe)
+    except Exception as exc:
+        logger.exception("Google Trends fetch failed for %s: %s", batch, exc)
+        return []
+    if data.empty:
+        return []
+
+    scale = 1.0
+    normalized = anchor in data and data[anchor].max() > 0
+    if normalized:
+        scale = 100.0 / float(data[anchor].max())
+    else:
+        logger.warning("Anchor %r has no interest in batch %s; series left unscaled", anchor, batch)
+
+    keywords = [keyword for keyword in (batch if include_anchor else batch[1:]) if keyword in data]
+    if not keywords:
+        return []
+    matrix = data[keywords].to_numpy(dtype=float).T * scale
+    features = batch_velocity_features(matrix)
+    detected_at = datetime.utcnow()
+    return [
+        TrendSignal(
+            topic=keyword,
+            source="google_trends",
+            score=float(feature["slope"]),
+            raw={
+                "series": row.tolist(),
+                "timeframe": timeframe,
+                "anchor": anchor,
+                "normalized": normalized,
+                "features": {name: float(feature[name]) for name in FEATURE_DTYPE.names},
+            },
+            detected_at=detected_at,
+        )
+        for keyword, row, feature in zip(keywords, matrix, features)
+    ]
+
+
+def google_trend_tasks(
+    keywords: Iterable[str] | None = None,
+    anchor: str | None = None,
+) -> list[Callable[[], list[TrendSignal]]]:
+    keywords = list(dict.fromkeys(keywords or DEFAULT_KEYWORDS))
+    anchor = anchor or keywords[0]
+    timeframe = _timeframe()
+    return [
+        partial(_fetch_batch, batch, timeframe, include_anchor=(index == 0 and anchor in keywords))
+        for index, batch in enumerate(_batches(keywords, anchor))
+    ]
+
+
+def fetch_google_trends(
+    keywords: Iterable[str] | None = None,
+    anchor: str | None = None,
+) -> list[TrendSignal]:
+    return [signal for task in google_trend_tasks(keywords, anchor) for signal in task()]
@@ -1,56 +1,153 @@
 from __future__ import annotations
 
 from datetime import datetime, timedelta
+from functools import lru_cache, partial
+from typing import Callable
 
 import praw
+from pymongo import UpdateOne
 
-from src.config import get_config, get_logger
+from src.config import COLLECTION_REDDIT_POSTS, DB_NAME, get_config, get_logger, get_mongo_client
 from src.trends.scorer import TrendSignal
 
 SUBREDDITS = ["personalfinance", "artificial", "SideHustle"]
+WINDOW = timedelta(days=2)
 
 
-def fetch_reddit_trends(limit: int = 25) -> list[TrendSignal]:
+@lru_cache(maxsize=1)
+def get_reddit_client() -> praw.Reddit:
     config = get_config()
-    logger = get_logger()
-
-    if not config.reddit_client_id or not config.reddit_client_secret:
-        logger.warning("Reddit credentials missing; skipping Reddit trends.")
-        return []
-
-    reddit = praw.Reddit(
+    return praw.Reddit(
         client_id=config.reddit_client_id,
         client_secret=config.reddit_client_secret,
         user_agent=config.reddit_user_agent,
     )
 
+
+def _hours_between(start: datetime, end: datetime) -> float:
+    return max((end - start).total_seconds() / 3600, 1)
+
+
+def _fetch_multireddit(subreddits: list[str], limit: int) -> list[TrendSignal]:
+    """Read one combined hot listing and emit velocity only for new or changed posts.
+
+    Velocity is always engagement gained since the previous pass, per hour. The
+    previous score and comment count of every post in the window are kept in
+    ``reddit_posts``, next to a cursor recording when the listing was last read.
+    A post created after that pass gained all of its engagement inside the
+    window; an older post seen for the first time has no baseline yet, so it is
+    only recorded and scored from the next pass on.
+    """
+    logger = get_logger()
+    collection = get_mongo_client()[DB_NAME][COLLECTION_REDDIT_POSTS]
+    cursor_id = f"cursor:{'+'.join(subreddits)}"
+    now = datetime.utcnow()
+    since = now - WINDOW
+
+    try:
+        listing = get_reddit_client().subreddit("+".join(subreddits)).hot(limit=limit)
+        submissions = [
+            submission
+            for submission in listing
+            if datetime.utcfromtimestamp(submission.created_utc) >= since
+        ]
+    except Exception as exc:
+        logger.exception("Reddit fetch failed for %s: %s", subreddits, exc)
+        return []
+
+    ids = [submission.fullname for submission in submissions]
+    try:
+        previous = {doc["_id"]: doc for doc in collection.find({"_id": {"$in": [cursor_id, *ids]}})}
+    except Exception as exc:
+        # Without history every post is new; the pass is scored like a first run.
+        logger.exception("Could not read Reddit post history: %s", exc)
+        previous = {}
+    cursor = previous.pop(cursor_id, None)
+    last_pass = cursor["seen_at"] if cursor else None
+
     signals: list[TrendSignal] = []
-    since = datetime.utcnow() - timedelta(days=2)
-
-    for subreddit in SUBREDDITS:
-        try:
-            for submission in reddit.subreddit(subreddit).hot(limit=limit):
-                created = datetime.utcfromtimestamp(submission.created_utc)
-                if created < since:
-                    continue
-                velocity = (submission.score + submission.num_comments) / max(
-                    (datetime.utcnow() - created).total_seconds() / 3600, 1
-                )
-                signals.append(
-                    TrendSignal(
-                        topic=submission.title,
-                        source=f"reddit:{subreddit}",
-                        score=float(velocity),
-                        raw={
-                            "score": submission.score,
-                            "comments": submission.num_comments,
-                            "url": submission.url,
-                            "created_utc": submission.created_utc,
-                        },
-                        detected_at=datetime.utcnow(),
-                    )
-                )
-        except Exception as exc:
-            logger.exception("Reddit fetch failed for %s: %s", subreddit, exc)
+    updates: list[UpdateOne] = []
+    unscored = 0
+    for submission in submissions:
+        created = datetime.utcfromtimestamp(submission.created_utc)
+        subreddit = submission.subreddit.display_name
+        engagement = submission.score + submission.num_comments
+        prev = previous.get(submission.fullname)
+        if prev:
+            delta = engagement - (prev["score"] + prev["comments"])
+            baseline_at = prev["seen_at"]
+        elif last_pass is None or created >= last_pass:
+            delta = engagement
+            baseline_at = created
+        else:
+            delta = None
+            baseline_at = None
+
+        updates.append(
+            UpdateOne(
+                {"_id": submission.fullname},
+                {
+                    "$set": {
+                        "score": submission.score,
+                        "comments": submission.num_comments,
+                        "seen_at": now,
+                    },
+                    "$setOnInsert": {
+                        "subreddit": subreddit,
+                        "title": submission.title,
+                        "created_at": created,
+                    },
+                },
+                upsert=True,
+            )
+        )
+        if baseline_at is None:
+            unscored += 1
+            continue
+        if prev and delta == 0:
+            continue
+        signals.append(
+            TrendSignal(
+                topic=submission.title,
+                source=f"reddit:{subreddit}",
+                score=float(delta / _hours_between(baseline_at, now)),
+                raw={
+                    "score": submission.score,
+                    "comments": submission.num_comments,
+                    "delta": delta,
+                    "url": submission.url,
+                    "created_utc": submission.created_utc,
+                },
+                detected_at=now,
+            )
+        )
 
+    updates.append(UpdateOne({"_id": cursor_id}, {"$set": {"seen_at": now}}, upsert=True))
+    try:
+        collection.bulk_write(updates, ordered=False)
+        collection.delete_many({"created_at": {"$lt": since}})
+    except Exception as exc:
+        # The signals are still good; the next pass just measures from an older baseline.
+        logger.exception("Could not store Reddit post history: %s", exc)
+    logger.info(
+        "Reddit pass: %d posts in window, %d new or changed, %d awaiting a baseline",
+        len(submissions),
+        len(signals),
+        unscored,
+    )
     return signals
+
+
+def reddit_trend_tasks(limit: int = 100) -> list[Callable[[], list[TrendSignal]]]:
+    config = get_config()
+    logger = get_logger()
+
+    if not config.reddit_client_id or not config.reddit_client_secret:
+        logger.warning("Reddit credentials missing; skipping Reddit trends.")
+        return []
+
+    return [partial(_fetch_multireddit, SUBREDDITS, limit)]
+
+
+def fetch_reddit_trends(limit: int = 100) -> list[TrendSignal]:
+    return [signal for task in reddit_trend_tasks(limit) for signal in task()]
@@ -6,6 +6,15 @@ from typing import Iterable
 
 import numpy as np
 
+FEATURE_DTYPE = np.dtype(
+    [
+        ("slope", "f8"),
+        ("acceleration", "f8"),
+        ("recent_slope", "f8"),
+        ("spike_z", "f8"),
+    ]
+)
+
 
 @dataclass
 class TrendSignal:
@@ -16,10 +25,56 @@ class TrendSignal:
     detected_at: datetime
 
 
+def _slopes(matrix: np.ndarray) -> np.ndarray:
+    """Least-squares linear slope of every row, in closed form."""
+    n = matrix.shape[1]
+    if n < 2:
+        return np.zeros(matrix.shape[0])
+    x = np.arange(n, dtype=float)
+    x -= x.mean()
+    return (matrix - matrix.mean(axis=1, keepdims=True)) @ x / (x @ x)
+
+
+def _accelerations(matrix: np.ndarray) -> np.ndarray:
+    """Second derivative (2 * quadratic coefficient) of a least-squares quadratic fit per row."""
+    n = matrix.shape[1]
+    if n < 3:
+        return np.zeros(matrix.shape[0])
+    x = np.arange(n, dtype=float)
+    x -= x.mean()
+    # x is centred, so x**2 minus its mean is orthogonal to both 1 and x.
+    q = x**2 - (x**2).mean()
+    return 2 * (matrix @ q) / (q @ q)
+
+
+def _spike_z(matrix: np.ndarray) -> np.ndarray:
+    """Z-score of each row's latest value against the rest of the row."""
+    if matrix.shape[1] < 3:
+        return np.zeros(matrix.shape[0])
+    history = matrix[:, :-1]
+    std = history.std(axis=1)
+    delta = matrix[:, -1] - history.mean(axis=1)
+    return np.divide(delta, std, out=np.zeros_like(delta), where=std > 0)
+
+
+def batch_velocity_features(series: Iterable[Iterable[float]], recent_window: int = 24) -> np.ndarray:
+    """Score many aligned series (rows = keywords, columns = time) in one vectorised pass.
+
+    Returns a structured array with ``FEATURE_DTYPE`` fields, one record per row.
+    """
+    matrix = np.atleast_2d(np.asarray(series, dtype=float))
+    features = np.zeros(matrix.shape[0], dtype=FEATURE_DTYPE)
+    if matrix.size == 0:
+        return features
+    features["slope"] = _slopes(matrix)
+    features["acceleration"] = _accelerations(matrix)
+    features["recent_slope"] = _slopes(matrix[:, -recent_window:])
+    features["spike_z"] = _spike_z(matrix)
+    return features
+
+
 def velocity_score(series: Iterable[float]) -> float:
     values = np.array(list(series), dtype=float)
     if values.size < 2:
         return 0.0
-    x = np.arange(values.size)
-    slope = np.polyfit(x, values, 1)[0]
-    return float(slope)
+    return float(_slopes(values[np.newaxis, :])[0])
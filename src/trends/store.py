@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+from typing import Iterable
+
+import numpy as np
+from pymongo import ASCENDING, UpdateOne
+
+from src.config import (
+    COLLECTION_TREND_ROLLUPS,
+    COLLECTION_TRENDS,
+    DB_NAME,
+    get_config,
+    get_logger,
+    get_mongo_client,
+)
+from src.db import topic_hash
+from src.trends.scorer import TrendSignal
+
+# Each bucket holds one (topic, source) pair for one UTC day.
+MAX_POINTS_PER_BUCKET = 96
+
+
+def _day(moment: datetime) -> datetime:
+    return datetime(moment.year, moment.month, moment.day)
+
+
+def _week(moment: datetime) -> datetime:
+    return _day(moment) - timedelta(days=moment.weekday())
+
+
+def compact_raw(raw: dict) -> dict:
+    """Store numeric series as packed float32 bytes instead of BSON arrays of doubles."""
+    if "series" not in raw:
+        return raw
+    series = np.asarray(raw["series"], dtype="<f4")
+    return {**raw, "series": series.tobytes(), "series_len": int(series.size)}
+
+
+def expand_raw(raw: dict) -> dict:
+    if not isinstance(raw.get("series"), (bytes, bytearray)):
+        return raw
+    expanded = {key: value for key, value in raw.items() if key != "series_len"}
+    expanded["series"] = np.frombuffer(raw["series"], dtype="<f4").astype(float).tolist()
+    return expanded
+
+
+def store_signals(signals: Iterable[TrendSignal]) -> None:
+    """Upsert signals into daily buckets and weekly rollups with one bulk write each.
+
+    Buckets expire after ``TREND_RETENTION_DAYS``; the downsampled weekly rollups
+    (count, sum, min, max) are kept for ``TREND_ROLLUP_RETENTION_DAYS``.
+    """
+    config = get_config()
+    db = get_mongo_client()[DB_NAME]
+
+    buckets: list[UpdateOne] = []
+    rollups: list[UpdateOne] = []
+    for signal in signals:
+        key = {"topic_hash": topic_hash(signal.topic), "source": signal.source}
+        window = _day(signal.detected_at)
+        period = _week(signal.detected_at)
+        buckets.append(
+            UpdateOne(
+                {**key, "window": window},
+                {
+                    "$setOnInsert": {
+                        "topic": signal.topic,
+                        "expires_at": window + timedelta(days=config.trend_retention_days),
+                    },
+                    "$set": {
+                        "last_score": signal.score,
+                        "last_detected_at": signal.detected_at,
+                        "raw": compact_raw(signal.raw),
+                    },
+                    "$push": {
+                        "points": {
+                            "$each": [{"t": signal.detected_at, "score": signal.score}],
+                            "$slice": -MAX_POINTS_PER_BUCKET,
+                        }
+                    },
+                    "$inc": {"count": 1, "score_sum": signal.score},
+                    "$max": {"score_max": signal.score},
+                    "$min": {"score_min": signal.score},
+                },
+                upsert=True,
+            )
+        )
+        rollups.append(
+            UpdateOne(
+                {**key, "period": period},
+                {
+                    "$setOnInsert": {
+                        "topic": signal.topic,
+                        "expires_at": period + timedelta(days=config.trend_rollup_retention_days),
+                    },
+                    "$set": {"last_score": signal.score},
+                    "$inc": {"count": 1, "score_sum": signal.score},
+                    "$max": {"score_max": signal.score},
+                    "$min": {"score_min": signal.score},
+                },
+                upsert=True,
+            )
+        )
+
+    if not buckets:
+        return
+    db[COLLECTION_TRENDS].bulk_write(buckets, ordered=False)
+    db[COLLECTION_TREND_ROLLUPS].bulk_write(rollups, ordered=False)
+    get_logger().info("Stored %d trend signals", len(buckets))
+
+
+def topic_history(topic: str, source: str | None = None, days: int = 7) -> list[dict]:
+    query: dict = {
+        "topic_hash": topic_hash(topic),
+        "window": {"$gte": _day(datetime.utcnow() - timedelta(days=days))},
+    }
+    if source:
+        query["source"] = source
+    collection = get_mongo_client()[DB_NAME][COLLECTION_TRENDS]
+    return [
+        {**doc, "raw": expand_raw(doc.get("raw", {}))}
+        for doc in collection.find(query).sort("window", ASCENDING)
+    ]
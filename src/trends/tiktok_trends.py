@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+from typing import Callable
+
 from src.config import get_logger
 
 
@@ -7,3 +9,7 @@ def fetch_tiktok_trends() -> list:
     logger = get_logger()
     logger.info("TikTok Creative Center scraping not implemented in MVP.")
     return []
+
+
+def tiktok_trend_tasks() -> list[Callable[[], list]]:
+    return [fetch_tiktok_trends]
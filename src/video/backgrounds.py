@@ -0,0 +1,193 @@
+from __future__ import annotations
+
+import os
+import subprocess
+import threading
+from dataclasses import dataclass
+from functools import partial
+from pathlib import Path
+from typing import Callable
+
+import numpy as np
+
+from src.config import get_logger
+from src.video.compositor import FPS, ffmpeg_binary
+
+# Bump when the generated gradients change so stale cache files are not reused.
+GENERATOR_VERSION = 1
+GRADIENT_TOP = np.array([11, 15, 26], dtype=float)
+GRADIENT_BOTTOM = np.array([28, 34, 51], dtype=float)
+STOCK_EXTENSIONS = (".mp4", ".mov", ".webm", ".mkv")
+
+
+@dataclass
+class Background:
+    """Pre-rendered background frames backed by a read-only memory map."""
+
+    name: str
+    frames: np.ndarray
+
+    @property
+    def static(self) -> bool:
+        return len(self.frames) == 1
+
+    def frame(self, index: int) -> np.ndarray:
+        # Animated backgrounds loop; views into the memmap are zero-copy.
+        return self.frames[index % len(self.frames)]
+
+    def __reduce__(self):
+        # Pickle by file path so worker processes map the same frames instead of copying them.
+        return (_map_frames, (self.name, self.frames.filename, self.frames.shape))
+
+
+def _map_frames(name: str, path: str, shape: tuple[int, ...]) -> Background:
+    return Background(name=name, frames=np.memmap(path, dtype=np.uint8, mode="r", shape=shape))
+
+
+def _gradient(width: int, height: int, shift: float = 0.0) -> np.ndarray:
+    gradient = np.clip(np.linspace(0, 1, height) + shift, 0, 1)[:, None]
+    colors = (GRADIENT_TOP + (GRADIENT_BOTTOM - GRADIENT_TOP) * gradient).astype(np.uint8)
+    return np.tile(colors[:, np.newaxis, :], (1, width, 1))
+
+
+def _grain(image: np.ndarray, rng: np.random.Generator, sigma: float) -> np.ndarray:
+    noise = rng.normal(0, sigma, image.shape).astype(np.int16)
+    return np.clip(image.astype(np.int16) + noise, 0, 255).astype(np.uint8)
+
+
+def _render_gradient(out: np.ndarray) -> None:
+    _, height, width, _ = out.shape
+    out[0] = _grain(_gradient(width, height), np.random.default_rng(GENERATOR_VERSION), 6)
+
+
+def _render_gradient_loop(out: np.ndarray) -> None:
+    count, height, width, _ = out.shape
+    rng = np.random.default_rng(GENERATOR_VERSION)
+    for index in range(count):
+        # One full sine period over the loop, so the last frame flows into the first.
+        shift = 0.15 * np.sin(2 * np.pi * index / count)
+        out[index] = _grain(_gradient(width, height, shift), rng, 4)
+
+
+class BackgroundLibrary:
+    """Renders backgrounds once into raw RGB frame files and serves them as memory maps.
+
+    Built-in names are ``gradient`` (static) and ``gradient_loop`` (animated). Any
+    video in the assets ``backgrounds`` directory is also available by file stem; it
+    is decoded once, scaled and cropped to the frame size, and capped at
+    ``max_seconds``.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Path,
+        width: int,
+        height: int,
+        loop_frames: int = 60,
+        max_seconds: float = 10.0,
+    ) -> None:
+        self.cache_dir = Path(cache_dir)
+        self.width = width
+        self.height = height
+        self.loop_frames = loop_frames
+        self.max_seconds = max_seconds
+        self._loaded: dict[str, Background] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def frame_bytes(self) -> int:
+        return self.width * self.height * 3
+
+    def _cache_path(self, name: str, fingerprint: str) -> Path:
+        return self.cache_dir / f"{name}-{self.width}x{self.height}-{fingerprint}.rgb"
+
+    def _open(self, name: str, path: Path) -> Background:
+        count = path.stat().st_size // self.frame_bytes
+        return _map_frames(name, str(path), (count, self.height, self.width, 3))
+
+    def _build_generated(self, path: Path, count: int, render: Callable[[np.ndarray], None]) -> None:
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        frames = np.memmap(tmp, dtype=np.uint8, mode="w+", shape=(count, self.height, self.width, 3))
+        render(frames)
+        frames.flush()
+        del frames
+        os.replace(tmp, path)
+
+    def _build_stock(self, path: Path, source: Path) -> None:
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        scale = (
+            f"scale={self.width}:{self.height}:force_original_aspect_ratio=increase,"
+            f"crop={self.width}:{self.height},fps={FPS}"
+        )
+        subprocess.run(
+            [
+                ffmpeg_binary(),
+                "-y",
+                "-loglevel",
+                "error",
+                "-i",
+                str(source),
+                "-t",
+                f"{self.max_seconds}",
+                "-an",
+                "-vf",
+                scale,
+                "-f",
+                "rawvideo",
+                "-pix_fmt",
+                "rgb24",
+                str(tmp),
+            ],
+            check=True,
+        )
+        if tmp.stat().st_size < self.frame_bytes:
+            tmp.unlink()
+            raise ValueError(f"Background clip {source} decoded to no frames")
+        os.replace(tmp, path)
+
+    def _stock_source(self, name: str, assets_dir: Path | None) -> Path | None:
+        if assets_dir is None:
+            return None
+        for ext in STOCK_EXTENSIONS:
+            candidate = assets_dir / "backgrounds" / f"{name}{ext}"
+            if candidate.exists():
+                return candidate
+        return None
+
+    def available(self, assets_dir: Path | None = None) -> list[str]:
+        names = ["gradient", "gradient_loop"]
+        if assets_dir is not None and (assets_dir / "backgrounds").exists():
+            names += sorted(
+                path.stem
+                for path in (assets_dir / "backgrounds").iterdir()
+                if path.suffix.lower() in STOCK_EXTENSIONS
+            )
+        return names
+
+    def get(self, name: str, assets_dir: Path | None = None) -> Background:
+        with self._lock:
+            if name in self._loaded:
+                return self._loaded[name]
+
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            if name == "gradient":
+                path = self._cache_path(name, f"v{GENERATOR_VERSION}")
+                build = partial(self._build_generated, path, 1, _render_gradient)
+            elif name == "gradient_loop":
+                path = self._cache_path(name, f"v{GENERATOR_VERSION}-{self.loop_frames}f")
+                build = partial(self._build_generated, path, self.loop_frames, _render_gradient_loop)
+            else:
+                source = self._stock_source(name, assets_dir)
+                if source is None:
+                    raise ValueError(f"Unknown background {name!r}")
+                stat = source.stat()
+                fingerprint = f"{stat.st_size}-{int(stat.st_mtime)}-{self.max_seconds:g}s"
+                path = self._cache_path(name, fingerprint)
+                build = partial(self._build_stock, path, source)
+
+            if not path.exists():
+                get_logger().info("Pre-rendering background %s into %s", name, path)
+                build()
+            background = self._open(name, path)
+            self._loaded[name] = background
+            return background
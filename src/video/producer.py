@@ -1,17 +1,29 @@
 from __future__ import annotations
 
+import math
+import threading
+from collections import OrderedDict
 from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
 
 import numpy as np
+import soundfile as sf
 from PIL import Image, ImageDraw, ImageFont
-from moviepy import AudioFileClip, CompositeVideoClip, ImageClip, vfx
 
-from src.config import get_logger
+from src.config import get_config, get_logger
+from src.video.backgrounds import Background, BackgroundLibrary
 from src.video.captions import build_captions
+from src.video.compositor import FPS, FrameCompositor, Overlay, encode_frames, frame_count
+from src.video.segments import render_segmented
 
 WIDTH = 1080
 HEIGHT = 1920
+# Bytes of rendered word sprites kept per process; common words repeat across videos.
+SPRITE_CACHE_BYTES = 64 * 1024 * 1024
+
+# Text bounding boxes do not depend on canvas size, so measure on a 1x1 image.
+_MEASURE = ImageDraw.Draw(Image.new("RGBA", (1, 1)))
 
 
 @dataclass
@@ -20,7 +32,8 @@ class VideoResult:
     duration: float
 
 
-def _find_font(fonts_dir: Path) -> Path | None:
+@lru_cache(maxsize=8)
+def _glob_font(fonts_dir: Path, mtime_ns: int | None) -> Path | None:
     for ext in ("*.ttf", "*.otf"):
         matches = list(fonts_dir.glob(ext))
         if matches:
@@ -28,26 +41,41 @@ def _find_font(fonts_dir: Path) -> Path | None:
     return None
 
 
+def _find_font(fonts_dir: Path) -> Path | None:
+    # Cached per directory mtime, which changes when a font is added or removed.
+    try:
+        mtime_ns = fonts_dir.stat().st_mtime_ns
+    except FileNotFoundError:
+        mtime_ns = None
+    return _glob_font(fonts_dir, mtime_ns)
+
+
+@lru_cache(maxsize=1)
+def get_background_library() -> BackgroundLibrary:
+    config = get_config()
+    return BackgroundLibrary(
+        Path(config.background_cache_dir),
+        WIDTH,
+        HEIGHT,
+        loop_frames=config.background_loop_frames,
+    )
+
+
 def _gradient_background() -> Image.Image:
-    top = np.array([11, 15, 26], dtype=float)
-    bottom = np.array([28, 34, 51], dtype=float)
-    gradient = np.linspace(0, 1, HEIGHT)[:, None]
-    colors = (top + (bottom - top) * gradient).astype(np.uint8)
-    image = np.tile(colors[:, np.newaxis, :], (1, WIDTH, 1))
-    noise = np.random.normal(0, 6, image.shape).astype(np.int16)
-    image = np.clip(image.astype(np.int16) + noise, 0, 255).astype(np.uint8)
-    return Image.fromarray(image, mode="RGB")
+    return Image.fromarray(get_background_library().get("gradient").frame(0), mode="RGB")
+
+
+@lru_cache(maxsize=32)
+def _load_font(font_path: Path | None, font_size: int) -> ImageFont.FreeTypeFont | ImageFont.ImageFont:
+    if font_path and font_path.exists():
+        return ImageFont.truetype(str(font_path), font_size)
+    return ImageFont.load_default()
 
 
 def _render_text(text: str, font_path: Path | None, font_size: int, stroke: int = 4) -> Image.Image:
-    font = (
-        ImageFont.truetype(str(font_path), font_size)
-        if font_path and font_path.exists()
-        else ImageFont.load_default()
-    )
-    dummy = Image.new("RGBA", (WIDTH, HEIGHT), (0, 0, 0, 0))
-    draw = ImageDraw.Draw(dummy)
-    text_bbox = draw.multiline_textbbox((0, 0), text, font=font, align="center")
+    """Render text onto a transparent sprite."""
+    font = _load_font(font_path, font_size)
+    text_bbox = _MEASURE.multiline_textbbox((0, 0), text, font=font, align="center")
     text_width = int(text_bbox[2] - text_bbox[0])
     text_height = int(text_bbox[3] - text_bbox[1])
     padding = 20
@@ -65,6 +93,43 @@ def _render_text(text: str, font_path: Path | None, font_size: int, stroke: int
     return canvas
 
 
+def _text_sprite(text: str, font_path: Path | None, font_size: int, stroke: int = 4) -> np.ndarray:
+    sprite = np.array(_render_text(text, font_path, font_size, stroke))
+    sprite.setflags(write=False)
+    return sprite
+
+
+class _SpriteCache:
+    """Least-recently-used sprites, bounded by their total size rather than their count."""
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self._sprites: OrderedDict[tuple, np.ndarray] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, text: str, font_path: Path | None, font_size: int, stroke: int = 4) -> np.ndarray:
+        key = (text, font_path, font_size, stroke)
+        with self._lock:
+            sprite = self._sprites.get(key)
+            if sprite is not None:
+                self._sprites.move_to_end(key)
+                return sprite
+        sprite = _text_sprite(text, font_path, font_size, stroke)
+        with self._lock:
+            if key not in self._sprites:
+                self._sprites[key] = sprite
+                self._bytes += sprite.nbytes
+                while self._bytes > self.max_bytes and len(self._sprites) > 1:
+                    _, evicted = self._sprites.popitem(last=False)
+                    self._bytes -= evicted.nbytes
+        return sprite
+
+
+# Only word sprites are cached; captions are whole phrases and almost never repeat.
+_word_sprites = _SpriteCache(SPRITE_CACHE_BYTES)
+
+
 def _word_timings(text: str, duration: float) -> list[tuple[str, float, float]]:
     words = text.split()
     if not words:
@@ -78,42 +143,52 @@ def _word_timings(text: str, duration: float) -> list[tuple[str, float, float]]:
     return timings
 
 
-def produce_video(script: dict, audio_path: Path, output_path: Path, assets_dir: Path) -> VideoResult:
-    logger = get_logger()
+def _build_overlays(script: dict, duration: float, font_path: Path | None) -> list[Overlay]:
+    overlays = []
+    for word, start, end in _word_timings(script["hook"] + " " + " ".join(script["body_points"]), duration):
+        sprite = _word_sprites.get(word.upper(), font_path, font_size=96)
+        overlays.append(Overlay(sprite, start, end, ("center", "center"), fade_in=0.15))
+
+    for caption in build_captions(script["narration"], duration):
+        sprite = _text_sprite(caption.text, font_path, font_size=54, stroke=3)
+        overlays.append(Overlay(sprite, caption.start, caption.end, ("center", HEIGHT - 320), fade_in=0.1))
+    return overlays
+
+
+def _audio_duration(audio_path: Path) -> float:
+    # Same value moviepy's AudioFileClip reports: ffmpeg's duration rounded to centiseconds.
+    info = sf.info(str(audio_path))
+    return math.floor(info.frames / info.samplerate * 100 + 0.5) / 100
+
+
+def _produce_moviepy(
+    script: dict,
+    audio_path: Path,
+    output_path: Path,
+    font_path: Path | None,
+    background: Background,
+) -> float:
+    # moviepy is slow to import and only this engine needs it.
+    from moviepy import AudioFileClip, CompositeVideoClip, ImageClip, VideoClip, vfx
+
     audio_clip = AudioFileClip(str(audio_path))
     duration = audio_clip.duration
 
-    background = _gradient_background()
-    bg_clip = ImageClip(np.array(background)).with_duration(duration)
+    if background.static:
+        bg_clip = ImageClip(background.frame(0)).with_duration(duration)
+    else:
+        bg_clip = VideoClip(lambda t: background.frame(int(round(t * FPS))), duration=duration)
 
-    font_path = _find_font(assets_dir / "fonts")
+    clips = [
+        ImageClip(overlay.sprite)
+        .with_start(overlay.start)
+        .with_end(overlay.end)
+        .with_position(overlay.position)
+        .with_effects([vfx.CrossFadeIn(overlay.fade_in)])
+        for overlay in _build_overlays(script, duration, font_path)
+    ]
 
-    word_clips = []
-    for word, start, end in _word_timings(script["hook"] + " " + " ".join(script["body_points"]), duration):
-        img = _render_text(word.upper(), font_path, font_size=96)
-        clip = (
-            ImageClip(np.array(img))
-            .with_start(start)
-            .with_end(end)
-            .with_position(("center", "center"))
-            .with_effects([vfx.CrossFadeIn(0.15)])
-        )
-        word_clips.append(clip)
-
-    caption_clips = []
-    captions = build_captions(script["narration"], duration)
-    for caption in captions:
-        img = _render_text(caption.text, font_path, font_size=54, stroke=3)
-        clip = (
-            ImageClip(np.array(img))
-            .with_start(caption.start)
-            .with_end(caption.end)
-            .with_position(("center", HEIGHT - 320))
-            .with_effects([vfx.CrossFadeIn(0.1)])
-        )
-        caption_clips.append(clip)
-
-    composite = CompositeVideoClip([bg_clip, *word_clips, *caption_clips], size=(WIDTH, HEIGHT))
+    composite = CompositeVideoClip([bg_clip, *clips], size=(WIDTH, HEIGHT))
     composite = composite.with_audio(audio_clip)
 
     output_path.parent.mkdir(parents=True, exist_ok=True)
@@ -121,11 +196,85 @@ def produce_video(script: dict, audio_path: Path, output_path: Path, assets_dir:
         str(output_path),
         codec="libx264",
         audio_codec="aac",
-        fps=30,
+        fps=FPS,
         preset="medium",
         threads=4,
         ffmpeg_params=["-pix_fmt", "yuv420p"],
     )
-    logger.info("Video rendered: %s", output_path)
+    return duration
+
+
+def _produce_numpy(
+    script: dict,
+    audio_path: Path,
+    output_path: Path,
+    font_path: Path | None,
+    background: Background,
+) -> float:
+    duration = _audio_duration(audio_path)
+    compositor = FrameCompositor(
+        background.frame,
+        _build_overlays(script, duration, font_path),
+        WIDTH,
+        HEIGHT,
+        static_background=background.static,
+    )
+    encode_frames(
+        compositor.frames(0, frame_count(duration)),
+        output_path,
+        WIDTH,
+        HEIGHT,
+        audio_path=audio_path,
+    )
+    return duration
+
+
+def _produce_segmented(
+    script: dict,
+    audio_path: Path,
+    output_path: Path,
+    font_path: Path | None,
+    background: Background,
+) -> float:
+    duration = _audio_duration(audio_path)
+    render_segmented(
+        _build_overlays(script, duration, font_path),
+        background,
+        frame_count(duration),
+        output_path,
+        WIDTH,
+        HEIGHT,
+        boundaries=[caption.start for caption in build_captions(script["narration"], duration)],
+        workers=get_config().render_workers,
+        audio_path=audio_path,
+    )
+    return duration
+
+
+ENGINES = {
+    "moviepy": _produce_moviepy,
+    "numpy": _produce_numpy,
+    "segmented": _produce_segmented,
+}
+
+
+def produce_video(
+    script: dict,
+    audio_path: Path,
+    output_path: Path,
+    assets_dir: Path,
+    engine: str | None = None,
+    background: str | None = None,
+) -> VideoResult:
+    logger = get_logger()
+    config = get_config()
+    engine = engine or config.video_engine
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown video engine {engine!r}; expected one of {sorted(ENGINES)}")
+
+    font_path = _find_font(assets_dir / "fonts")
+    frames = get_background_library().get(background or config.video_background, assets_dir)
+    duration = ENGINES[engine](script, audio_path, output_path, font_path, frames)
+    logger.info("Video rendered: %s (engine=%s, background=%s)", output_path, engine, frames.name)
 
     return VideoResult(video_path=output_path, duration=duration)
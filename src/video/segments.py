@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+import bisect
+import math
+import multiprocessing
+import os
+import subprocess
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+
+from src.config import get_logger
+from src.video.backgrounds import Background
+from src.video.compositor import ENCODER_ARGS, FPS, FrameCompositor, Overlay, encode_frames, ffmpeg_binary
+
+# Shorter segments cost more in process start-up and keyframes than they win back.
+MIN_SEGMENT_SECONDS = 2.0
+
+
+@dataclass(frozen=True)
+class Segment:
+    index: int
+    start: int
+    stop: int
+
+
+def plan_segments(
+    total_frames: int,
+    boundaries: list[float],
+    count: int,
+    fps: int = FPS,
+) -> list[Segment]:
+    """Split ``[0, total_frames)`` into up to ``count`` segments cut at boundary times.
+
+    Each cut is snapped to the boundary closest to an even split, so segments start
+    on a caption change (where a fresh keyframe costs nothing) and stay balanced.
+    """
+    count = max(1, min(count, int(total_frames / (MIN_SEGMENT_SECONDS * fps))))
+    candidates = sorted({math.ceil(t * fps) for t in boundaries if 0 < math.ceil(t * fps) < total_frames})
+    cuts: list[int] = []
+    for part in range(1, count):
+        if not candidates:
+            break
+        ideal = total_frames * part / count
+        pos = bisect.bisect_left(candidates, ideal)
+        nearby = candidates[max(0, pos - 1) : pos + 1]
+        cut = min(nearby, key=lambda frame: abs(frame - ideal))
+        if cut > (cuts[-1] if cuts else 0):
+            cuts.append(cut)
+
+    edges = [0, *cuts, total_frames]
+    return [Segment(index, start, stop) for index, (start, stop) in enumerate(zip(edges, edges[1:]))]
+
+
+def _segment_overlays(overlays: list[Overlay], segment: Segment, fps: int) -> list[Overlay]:
+    start, stop = segment.start / fps, segment.stop / fps
+    return [overlay for overlay in overlays if overlay.start < stop and overlay.end > start]
+
+
+def _render_segment(
+    segment: Segment,
+    overlays: list[Overlay],
+    background: Background,
+    output_path: Path,
+    width: int,
+    height: int,
+    fps: int,
+    encoder_args: list[str],
+) -> Path:
+    compositor = FrameCompositor(
+        background.frame,
+        overlays,
+        width,
+        height,
+        static_background=background.static,
+    )
+    encode_frames(
+        compositor.frames(segment.start, segment.stop, fps),
+        output_path,
+        width,
+        height,
+        fps=fps,
+        encoder_args=encoder_args,
+    )
+    return output_path
+
+
+def _concat(parts: list[Path], output_path: Path, audio_path: Path | None, workdir: Path) -> None:
+    listing = workdir / "segments.txt"
+    listing.write_text(
+        "".join("file '{}'\n".format(str(part.resolve()).replace("'", "'\\''")) for part in parts),
+        encoding="utf-8",
+    )
+    cmd = [ffmpeg_binary(), "-y", "-loglevel", "error", "-f", "concat", "-safe", "0", "-i", str(listing)]
+    if audio_path is not None:
+        cmd += ["-i", str(audio_path), "-map", "0:v", "-map", "1:a", "-acodec", "aac"]
+    cmd += ["-vcodec", "copy", str(output_path)]
+    result = subprocess.run(cmd, capture_output=True)
+    if result.returncode != 0:
+        stderr = result.stderr.decode("utf-8", "replace").strip()
+        raise RuntimeError(f"ffmpeg concat failed ({result.returncode}): {stderr}")
+
+
+def render_segmented(
+    overlays: list[Overlay],
+    background: Background,
+    total_frames: int,
+    output_path: Path,
+    width: int,
+    height: int,
+    boundaries: list[float],
+    workers: int,
+    audio_path: Path | None = None,
+    fps: int = FPS,
+) -> None:
+    """Render segments in a process pool and join them with ffmpeg's concat demuxer.
+
+    Every segment is an independent H.264 stream with identical encoder settings,
+    so the join is a stream copy; audio is encoded once, during the join.
+    """
+    logger = get_logger()
+    segments = plan_segments(total_frames, boundaries, workers, fps)
+    # Split the cores between the segment encoders instead of oversubscribing them.
+    threads = max(1, (os.cpu_count() or 1) // len(segments))
+    encoder_args = [*ENCODER_ARGS[: ENCODER_ARGS.index("-threads")], "-threads", str(threads)]
+
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    with tempfile.TemporaryDirectory(prefix="segments-", dir=output_path.parent) as tmp:
+        workdir = Path(tmp)
+        parts = [workdir / f"segment_{segment.index:03d}.mp4" for segment in segments]
+        jobs = [
+            (
+                segment,
+                _segment_overlays(overlays, segment, fps),
+                background,
+                part,
+                width,
+                height,
+                fps,
+                encoder_args,
+            )
+            for segment, part in zip(segments, parts)
+        ]
+        if len(segments) == 1:
+            _render_segment(*jobs[0])
+        else:
+            with ProcessPoolExecutor(
+                max_workers=min(workers, len(segments)),
+                mp_context=multiprocessing.get_context("spawn"),
+            ) as pool:
+                for future in [pool.submit(_render_segment, *job) for job in jobs]:
+                    future.result()
+        logger.info("Rendered %d segments (%d frames); joining", len(segments), total_frames)
+        _concat(parts, output_path, audio_path, workdir)
@@ -1,12 +1,37 @@
 from __future__ import annotations
 
+import importlib.metadata
+import multiprocessing
+import os
+import re
+import struct
+import threading
+import time
+import unicodedata
+from concurrent.futures import Future, ProcessPoolExecutor
 from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
+from typing import Iterable
 
+import numpy as np
 import soundfile as sf
 from pykokoro import KokoroPipeline, PipelineConfig
 
-from src.config import get_logger
+from src.cache import DiskCache, cache_key
+from src.config import get_config, get_logger
+from src.metrics import record_worker_cpu
+from src.scripts.sentences import split_sentences
+
+# Silence inserted between separately synthesized sentences.
+SENTENCE_GAP = 0.12
+# Samples quieter than this at either end of a sentence are trimmed before stitching.
+SILENCE_THRESHOLD = 1e-3
+EDGE_PADDING = 0.02
+
+# A spawned pool worker re-imports the caller's __main__ module, so only entry
+# points that guard theirs turn the pool on; one-off scripts synthesize in-process.
+_pool_enabled = False
 
 
 @dataclass
@@ -16,22 +41,202 @@ class VoiceoverResult:
     duration: float
 
 
+@lru_cache(maxsize=1)
+def _engine_version() -> str:
+    return f"pykokoro-{importlib.metadata.version('pykokoro')}"
+
+
+@lru_cache(maxsize=1)
+def get_tts_cache() -> DiskCache:
+    config = get_config()
+    return DiskCache(
+        Path(config.tts_cache_dir),
+        max_bytes=config.tts_cache_max_mb * 1024 * 1024,
+        suffix=".pcm",
+    )
+
+
+def _normalize_sentence(text: str) -> str:
+    # Case is kept: Kokoro reads "AI" and "ai" differently.
+    return re.sub(r"\s+", " ", unicodedata.normalize("NFC", text)).strip()
+
+
+def _encode_pcm(audio: np.ndarray, sample_rate: int) -> bytes:
+    return struct.pack("<I", sample_rate) + np.asarray(audio, dtype="<f4").tobytes()
+
+
+def _decode_pcm(data: bytes) -> tuple[np.ndarray, int]:
+    (sample_rate,) = struct.unpack_from("<I", data)
+    return np.frombuffer(data, dtype="<f4", offset=4).astype(np.float32), sample_rate
+
+
+@lru_cache(maxsize=None)
+def _load_pipeline(voice: str) -> KokoroPipeline:
+    return KokoroPipeline(PipelineConfig(voice=voice))
+
+
+def _warm_worker(voice: str) -> None:
+    _load_pipeline(voice)
+
+
+def _synthesize_sentence(voice: str, text: str) -> tuple[np.ndarray, int]:
+    result = _load_pipeline(voice).run(text)
+    return np.asarray(result.audio, dtype=np.float32), int(result.sample_rate)
+
+
+def _synthesize_in_worker(voice: str, text: str) -> tuple[np.ndarray, int, float]:
+    """Pool-side synthesis that also returns the CPU seconds it used."""
+    start = time.process_time()
+    audio, sample_rate = _synthesize_sentence(voice, text)
+    return audio, sample_rate, time.process_time() - start
+
+
+def _report_worker_cpu(inner: Future, outer: Future) -> None:
+    if inner.cancelled():
+        outer.cancel()
+        return
+    error = inner.exception()
+    if error is not None:
+        outer.set_exception(error)
+        return
+    audio, sample_rate, cpu_s = inner.result()
+    record_worker_cpu(cpu_s)
+    outer.set_result((audio, sample_rate))
+
+
+def _trim_silence(audio: np.ndarray, sample_rate: int) -> np.ndarray:
+    voiced = np.flatnonzero(np.abs(audio) > SILENCE_THRESHOLD)
+    if voiced.size == 0:
+        return audio
+    padding = int(EDGE_PADDING * sample_rate)
+    return audio[max(0, voiced[0] - padding) : voiced[-1] + padding + 1]
+
+
+class TTSEngine:
+    """Warm Kokoro synthesis for one voice, shared by every generator in the process.
+
+    With ``workers > 0`` sentences are synthesized in a pool of processes that each
+    load the model once at start-up; with ``workers == 0`` they run in-process.
+    """
+
+    def __init__(self, voice: str, workers: int) -> None:
+        self.voice = voice
+        self.workers = workers
+        self._lock = threading.Lock()
+        self._executor: ProcessPoolExecutor | None = None
+        if workers > 0:
+            self._executor = ProcessPoolExecutor(
+                max_workers=workers,
+                # spawn, not fork: the parent runs scheduler and HTTP threads.
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_warm_worker,
+                initargs=(voice,),
+            )
+
+    def warm(self) -> None:
+        if self._executor is None:
+            _load_pipeline(self.voice)
+            return
+        for future in [self._executor.submit(_warm_worker, self.voice) for _ in range(self.workers)]:
+            future.result()
+
+    def submit(self, sentence: str) -> Future:
+        if self._executor is not None:
+            # Pool workers outlive the stage, so they report their CPU time for stage metrics.
+            outer: Future = Future()
+            inner = self._executor.submit(_synthesize_in_worker, self.voice, sentence)
+            inner.add_done_callback(lambda done: _report_worker_cpu(done, outer))
+            return outer
+        future: Future = Future()
+        try:
+            with self._lock:
+                future.set_result(_synthesize_sentence(self.voice, sentence))
+        except Exception as exc:
+            future.set_exception(exc)
+        return future
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+
+
+def enable_tts_pool() -> None:
+    """Synthesize in worker processes; call before the first engine is created.
+
+    Only safe from a ``__main__`` guarded entry point. ``TTS_WORKERS`` overrides
+    the pool size either way, and ``TTS_WORKERS=0`` keeps synthesis in-process.
+    """
+    global _pool_enabled
+    _pool_enabled = True
+
+
+def tts_workers() -> int:
+    configured = get_config().tts_workers
+    if configured is not None:
+        return configured
+    return max(1, (os.cpu_count() or 2) // 2) if _pool_enabled else 0
+
+
+@lru_cache(maxsize=None)
+def get_tts_engine(voice: str = "af_bella") -> TTSEngine:
+    return TTSEngine(voice, workers=tts_workers())
+
+
 class VoiceoverGenerator:
     def __init__(self, voice: str = "af_bella") -> None:
         self.voice = voice
-        self._pipeline: KokoroPipeline | None = None
         self.logger = get_logger()
 
-    def _get_pipeline(self) -> KokoroPipeline:
-        if self._pipeline is None:
-            self._pipeline = KokoroPipeline(PipelineConfig(voice=self.voice))
-        return self._pipeline
-
-    def synthesize(self, text: str, output_path: Path) -> VoiceoverResult:
-        pipeline = self._get_pipeline()
-        result = pipeline.run(text)
+    def _write(self, audio: np.ndarray, sample_rate: int, output_path: Path) -> VoiceoverResult:
         output_path.parent.mkdir(parents=True, exist_ok=True)
-        sf.write(str(output_path), result.audio, result.sample_rate)
-        duration = len(result.audio) / float(result.sample_rate)
+        sf.write(str(output_path), audio, sample_rate)
+        duration = len(audio) / float(sample_rate)
         self.logger.info("Generated voiceover: %s (%.2fs)", output_path, duration)
-        return VoiceoverResult(output_path, result.sample_rate, duration)
+        return VoiceoverResult(output_path, sample_rate, duration)
+
+    def synthesize(self, text: str, output_path: Path) -> VoiceoverResult:
+        return self.synthesize_stream(split_sentences(text), output_path)
+
+    def synthesize_stream(self, sentences: Iterable[str], output_path: Path) -> VoiceoverResult:
+        """Synthesize sentences in parallel as they arrive and stitch them with even gaps.
+
+        Sentences already in the audio cache are read back instead of re-synthesized.
+        """
+        engine = get_tts_engine(self.voice)
+        cache = get_tts_cache() if get_config().tts_cache_enabled else None
+        pending: list[tuple[str | None, Future]] = []
+        for sentence in sentences:
+            key = None
+            if cache is not None:
+                key = cache_key(self.voice, _normalize_sentence(sentence), _engine_version())
+                cached = cache.get(key)
+                if cached is not None:
+                    future: Future = Future()
+                    future.set_result(_decode_pcm(cached))
+                    pending.append((None, future))
+                    continue
+            pending.append((key, engine.submit(sentence)))
+        if not pending:
+            raise ValueError("No narration sentences to synthesize.")
+
+        pieces: list[np.ndarray] = []
+        sample_rate = 0
+        for key, future in pending:
+            audio, sample_rate = future.result()
+            if key is not None:
+                cache.set(key, _encode_pcm(audio, sample_rate))
+            if pieces:
+                pieces.append(np.zeros(int(SENTENCE_GAP * sample_rate), dtype=np.float32))
+            pieces.append(_trim_silence(audio, sample_rate))
+
+        if cache is not None:
+            synthesized = sum(1 for key, _ in pending if key is not None)
+            stats = cache.stats()
+            self.logger.info(
+                "TTS cache: %d of %d sentences reused (process totals: %d hits, %d misses)",
+                len(pending) - synthesized,
+                len(pending),
+                stats["hits"],
+                stats["misses"],
+            )
+        return self._write(np.concatenate(pieces), sample_rate, output_path)
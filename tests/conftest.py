@@ -0,0 +1,14 @@
+import pytest
+
+# Modules that bind get_mongo_client at import time.
+MONGO_MODULES = ["src.config", "src.jobs", "src.run_state", "src.metrics"]
+
+
+@pytest.fixture
+def mongo(monkeypatch):
+    """An in-memory MongoDB standing in for the configured server."""
+    mongomock = pytest.importorskip("mongomock")
+    client = mongomock.MongoClient()
+    for module in MONGO_MODULES:
+        monkeypatch.setattr(f"{module}.get_mongo_client", lambda: client)
+    return client
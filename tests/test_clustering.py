@@ -0,0 +1,78 @@
+from datetime import datetime
+
+import numpy as np
+
+from src.trends.clustering import SOURCE_BOOST, cluster_signals, minhash
+from src.trends.scorer import TrendSignal
+
+
+def signal(topic, source, score):
+    return TrendSignal(topic=topic, source=source, score=score, raw={}, detected_at=datetime(2024, 1, 1))
+
+
+def test_minhash_is_deterministic_and_similarity_preserving():
+    a = minhash("AI budgeting apps are taking over")
+    assert np.array_equal(a, minhash("AI budgeting apps are taking over"))
+    near = np.mean(a == minhash("AI budgeting apps are taking over!"))
+    far = np.mean(a == minhash("Index funds versus real estate"))
+    assert near > 0.8
+    assert far < 0.2
+
+
+def test_near_duplicates_merge_across_sources():
+    merged = cluster_signals(
+        [
+            signal("AI budgeting apps are taking over", "google_trends", 2.0),
+            signal("AI Budgeting Apps Are Taking Over!", "reddit:personalfinance", 5.0),
+            signal("Index funds versus real estate", "google_trends", 1.0),
+        ]
+    )
+    assert len(merged) == 2
+    top = max(merged, key=lambda s: s.score)
+    assert top.topic == "AI Budgeting Apps Are Taking Over!"
+    assert top.score == 5.0 * (1 + SOURCE_BOOST)
+    assert top.raw["sources"] == ["google_trends", "reddit:personalfinance"]
+    assert len(top.raw["members"]) == 2
+
+
+def test_distinct_topics_stay_apart():
+    topics = ["side hustle ideas", "crypto tax rules", "passive income with AI", "credit card rewards"]
+    merged = cluster_signals([signal(topic, "google_trends", 1.0) for topic in topics])
+    assert sorted(s.topic for s in merged) == sorted(topics)
+
+
+def test_single_signal_passes_through():
+    only = signal("solo", "tiktok", 1.0)
+    assert cluster_signals([only]) == [only]
+
+
+def test_short_keywords_join_titles_containing_them():
+    merged = cluster_signals(
+        [
+            signal("AI tools", "google_trends", 1.0),
+            signal("These new AI tools will save you hours", "reddit:ChatGPT", 3.0),
+            signal("passive income", "google_trends", 2.0),
+            signal("How I built passive income with AI", "reddit:personalfinance", 1.5),
+            signal("AI", "tiktok", 1.0),
+        ]
+    )
+    by_topic = {s.topic: s for s in merged}
+    assert set(by_topic) == {"These new AI tools will save you hours", "passive income", "AI"}
+    assert by_topic["passive income"].raw["sources"] == ["google_trends", "reddit:personalfinance"]
+
+
+def test_phrases_match_whole_words_only():
+    merged = cluster_signals(
+        [signal("AI tools", "google_trends", 1.0), signal("Paid toolsets for maids", "reddit:x", 1.0)]
+    )
+    assert len(merged) == 2
+
+
+def test_agreement_does_not_deepen_a_decline():
+    merged = cluster_signals(
+        [
+            signal("AI budgeting apps are taking over", "google_trends", -2.0),
+            signal("AI Budgeting Apps Are Taking Over!", "reddit:personalfinance", -1.0),
+        ]
+    )
+    assert [s.score for s in merged] == [-1.0]
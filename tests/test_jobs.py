@@ -0,0 +1,135 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.jobs import RETRY_BACKOFF, STATUS_DONE, STATUS_FAILED, STATUS_QUEUED, JobQueue
+
+TREND = {"topic": "AI budgeting apps", "source": "google_trends", "score": 1.0}
+
+
+@pytest.fixture
+def jobs(mongo):
+    return JobQueue(lease=timedelta(minutes=5), max_attempts=2)
+
+
+def replica(jobs):
+    """Another worker sharing the same queue."""
+    return JobQueue(lease=jobs.lease, max_attempts=jobs.max_attempts)
+
+
+def expire_lease(jobs, key):
+    jobs.collection.update_one({"_id": key}, {"$set": {"lease_until": datetime.utcnow() - timedelta(seconds=1)}})
+
+
+def test_enqueue_skips_a_queued_topic(jobs):
+    assert jobs.enqueue("t1", TREND, "script")
+    assert not jobs.enqueue("t1", TREND, "script")
+    assert jobs.pending_keys() == {"t1"}
+
+
+def test_enqueue_requeues_a_settled_topic(jobs):
+    jobs.enqueue("t1", TREND, "script")
+    jobs.claim("script")
+    jobs.advance("t1", None)
+    assert jobs.status(["t1"]) == {"t1": STATUS_DONE}
+
+    assert jobs.enqueue("t1", TREND, "script")
+    doc = jobs.collection.find_one({"_id": "t1"})
+    assert doc["status"] == STATUS_QUEUED
+    assert doc["attempts"] == 0
+    assert "finished_at" not in doc
+
+
+def test_claim_takes_a_lease(jobs):
+    jobs.enqueue("t1", TREND, "script")
+    assert jobs.claim("render") is None
+
+    doc = jobs.claim("script")
+    assert doc["_id"] == "t1"
+    assert doc["lease_owner"] == jobs.owner
+    assert doc["attempts"] == 1
+    assert doc["lease_until"] > datetime.utcnow()
+    assert replica(jobs).claim("script") is None
+
+
+def test_expired_lease_moves_to_another_worker(jobs):
+    other = replica(jobs)
+    jobs.enqueue("t1", TREND, "script")
+    jobs.claim("script")
+    expire_lease(jobs, "t1")
+
+    doc = other.claim("script")
+    assert doc["lease_owner"] == other.owner
+    assert doc["attempts"] == 2
+    # The first worker's late result no longer counts.
+    assert not jobs.heartbeat("t1")
+    assert not jobs.advance("t1", "render")
+    assert other.heartbeat("t1")
+    assert other.advance("t1", "render")
+
+
+def test_advance_through_the_stages(jobs):
+    jobs.enqueue("t1", TREND, "script")
+    jobs.claim("script")
+    assert jobs.advance("t1", "render")
+
+    doc = jobs.collection.find_one({"_id": "t1"})
+    assert (doc["stage"], doc["status"], doc["attempts"]) == ("render", STATUS_QUEUED, 0)
+    assert "lease_owner" not in doc
+
+    jobs.claim("render")
+    assert jobs.advance("t1", None)
+    assert jobs.status(["t1"]) == {"t1": STATUS_DONE}
+    assert jobs.pending_keys() == set()
+
+
+def test_fail_backs_off_then_gives_up(jobs):
+    jobs.enqueue("t1", TREND, "script")
+    doc = jobs.claim("script")
+    # Stored datetimes keep milliseconds, as in BSON.
+    before = datetime.utcnow() - timedelta(milliseconds=1)
+    assert not jobs.fail("t1", ValueError("boom"), doc["attempts"])
+
+    doc = jobs.collection.find_one({"_id": "t1"})
+    assert doc["status"] == STATUS_QUEUED
+    assert doc["last_error"] == "ValueError('boom')"
+    assert doc["available_at"] >= before + RETRY_BACKOFF
+    assert jobs.claim("script") is None  # still backing off
+
+    jobs.collection.update_one({"_id": "t1"}, {"$set": {"available_at": datetime.utcnow()}})
+    doc = jobs.claim("script")
+    assert jobs.fail("t1", ValueError("again"), doc["attempts"])
+    assert jobs.status(["t1"]) == {"t1": STATUS_FAILED}
+
+
+def test_reap_fails_a_stranded_last_attempt(jobs):
+    jobs.enqueue("t1", TREND, "script")
+    for _ in range(jobs.max_attempts):
+        jobs.claim("script")
+        expire_lease(jobs, "t1")
+    assert jobs.claim("script") is None
+    assert jobs.reap("render") is None
+
+    doc = jobs.reap("script")
+    assert doc["status"] == STATUS_FAILED
+    assert "lease expired" in doc["last_error"]
+    assert jobs.reap("script") is None
+    assert jobs.pending_keys() == set()
+
+
+def test_reap_leaves_a_live_last_attempt(jobs):
+    jobs.enqueue("t1", TREND, "script")
+    for _ in range(jobs.max_attempts):
+        expire_lease(jobs, "t1")
+        jobs.claim("script")
+    assert jobs.reap("script") is None
+
+
+def test_one_tick_per_period(jobs):
+    other = replica(jobs)
+    assert jobs.acquire_tick("collect", timedelta(minutes=10))
+    assert not other.acquire_tick("collect", timedelta(minutes=10))
+    assert not jobs.acquire_tick("collect", timedelta(minutes=10))
+
+    jobs.collection.update_one({"_id": "tick:collect"}, {"$set": {"next_tick_at": datetime.utcnow()}})
+    assert other.acquire_tick("collect", timedelta(minutes=10))
@@ -0,0 +1,45 @@
+import json
+
+import pytest
+
+from src.scripts.generator import JSONFieldStreamer
+
+DOCUMENT = {
+    "hook": "Stop \"saving\" money",
+    "narration": "Line one.\nLine two — with a tab\tand emoji \U0001F4B0.",
+    "body_points": ["a", "narration"],
+    "nested": {"narration": "not this one"},
+}
+
+
+def stream(text, chunk_size, field="narration"):
+    streamer = JSONFieldStreamer(field)
+    pieces = [streamer.feed(text[i : i + chunk_size]) for i in range(0, len(text), chunk_size)]
+    return "".join(pieces), streamer
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 1000])
+def test_decodes_the_field_regardless_of_chunking(chunk_size):
+    text = json.dumps(DOCUMENT)  # escapes non-ASCII as \uXXXX, including a surrogate pair
+    decoded, streamer = stream(text, chunk_size)
+    assert decoded == DOCUMENT["narration"]
+    assert streamer.done
+
+
+def test_ignores_text_before_the_document():
+    decoded, _ = stream("```json\n" + json.dumps(DOCUMENT, ensure_ascii=False) + "\n```", 5)
+    assert decoded == DOCUMENT["narration"]
+
+
+def test_only_top_level_keys_match():
+    decoded, streamer = stream(json.dumps({"nested": {"narration": "inner"}, "other": "narration"}), 4)
+    assert decoded == ""
+    assert not streamer.done
+
+
+def test_partial_input_yields_what_has_arrived():
+    streamer = JSONFieldStreamer("narration")
+    assert streamer.feed('{"narration": "Hel') == "Hel"
+    assert not streamer.done
+    assert streamer.feed('lo", "hook": "x"}') == "lo"
+    assert streamer.done
@@ -0,0 +1,59 @@
+import pytest
+
+from src.run_state import RunState, exhausted_runs, resumable_runs
+
+TREND = {"topic": "AI budgeting apps", "source": "google_trends", "score": 1.0, "raw": {"unencodable": object()}}
+
+
+@pytest.fixture
+def state(mongo):
+    return RunState.start("t1", TREND)
+
+
+def test_start_counts_attempts_and_keeps_a_summary(state):
+    assert state.doc["attempts"] == 1
+    assert state.doc["trend"] == {"topic": "AI budgeting apps", "source": "google_trends", "score": 1.0}
+    assert RunState.start("t1", TREND).doc["attempts"] == 2
+
+
+def test_completed_stage_is_reused_for_the_same_inputs(state):
+    state.complete("script", input_key="k1", script={"title": "x"})
+    assert state.completed("script", "k1")["script"] == {"title": "x"}
+    assert state.completed("script", "k2") is None
+    assert state.completed("render", "k1") is None
+    # Checkpoints survive a reload, e.g. on another replica.
+    assert RunState.load("t1").completed("script", "k1") is not None
+
+
+def test_changed_artifact_invalidates_the_stage(state, tmp_path):
+    video = tmp_path / "video.mp4"
+    video.write_bytes(b"frames")
+    state.complete("render", artifacts={"video": video})
+    assert state.completed("render") is not None
+
+    video.write_bytes(b"FRAMES")  # same size, different content
+    assert state.completed("render") is None
+    video.unlink()
+    assert state.completed("render") is None
+
+
+def test_load_unknown_run(mongo):
+    with pytest.raises(LookupError):
+        RunState.load("missing")
+
+
+def test_resumable_and_exhausted_runs(mongo):
+    RunState.start("running", TREND)
+    RunState.start("failed", TREND).fail(ValueError("boom"))
+    RunState.start("done", TREND).finish()
+    spent = RunState.start("spent", TREND)
+    RunState.start("spent", TREND).fail(ValueError("boom"))
+
+    resumable = {doc["_id"] for doc in resumable_runs(limit=10, max_attempts=2)}
+    assert resumable == {"running", "failed"}
+    assert {doc["_id"] for doc in resumable_runs(limit=10, max_attempts=2, exclude={"failed"})} == {"running"}
+    assert resumable_runs(limit=0, max_attempts=2) == []
+
+    assert exhausted_runs(["running", "done", "spent"], max_attempts=2) == {"spent"}
+    spent.finish()
+    assert exhausted_runs(["spent"], max_attempts=2) == set()
@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+from src.trends.scorer import FEATURE_DTYPE, batch_velocity_features, velocity_score
+
+
+@pytest.fixture
+def series():
+    rng = np.random.default_rng(7)
+    return np.cumsum(rng.normal(0.5, 3, size=(5, 48)), axis=1) + 50
+
+
+def test_slope_matches_polyfit(series):
+    features = batch_velocity_features(series)
+    x = np.arange(series.shape[1])
+    expected = [np.polyfit(x, row, 1)[0] for row in series]
+    np.testing.assert_allclose(features["slope"], expected)
+
+
+def test_acceleration_is_twice_the_quadratic_coefficient(series):
+    features = batch_velocity_features(series)
+    x = np.arange(series.shape[1])
+    expected = [2 * np.polyfit(x, row, 2)[0] for row in series]
+    np.testing.assert_allclose(features["acceleration"], expected)
+
+
+def test_recent_slope_uses_the_window(series):
+    features = batch_velocity_features(series, recent_window=12)
+    x = np.arange(12)
+    expected = [np.polyfit(x, row[-12:], 1)[0] for row in series]
+    np.testing.assert_allclose(features["recent_slope"], expected)
+
+
+def test_spike_z_scores_the_latest_value():
+    row = np.array([10.0, 12.0, 8.0, 10.0, 30.0])
+    history = row[:-1]
+    expected = (row[-1] - history.mean()) / history.std()
+    assert batch_velocity_features([row])["spike_z"][0] == pytest.approx(expected)
+
+
+def test_flat_history_has_no_spike():
+    assert batch_velocity_features([[5.0, 5.0, 5.0, 9.0]])["spike_z"][0] == 0.0
+
+
+def test_short_and_empty_series():
+    assert velocity_score([]) == 0.0
+    assert velocity_score([3.0]) == 0.0
+    assert velocity_score([1.0, 3.0]) == pytest.approx(2.0)
+    features = batch_velocity_features([[1.0, 2.0]])
+    assert features["acceleration"][0] == 0.0
+    assert batch_velocity_features(np.empty((0, 0))).dtype == FEATURE_DTYPE
+
+
+def test_velocity_score_is_the_linear_slope():
+    assert velocity_score([2 * x + 1 for x in range(10)]) == pytest.approx(2.0)